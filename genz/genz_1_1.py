@@ -19,13 +19,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import textwrap
 import re
 import shutil
 import crcmod
 from pdb import set_trace
 from uuid import UUID
-from typing import Optional
+from typing import Optional, NamedTuple
 from .genz_common import *
 
 cols, lines = shutil.get_terminal_size()
@@ -33,6 +34,16 @@ cols, lines = shutil.get_terminal_size()
 # match Reserved field names
 rv_re = re.compile('^R\d+$')
 
+class FieldLayout(NamedTuple):
+    '''Precomputed __str__/__repr__ info for one ControlStructure field'''
+    kind: int        # ControlStructure.FIELD, RSVD, UUID or ARRAY
+    name: str
+    label: str       # name, without the 'h'/'l' suffix for a UUID
+    byteOffset: int
+    prefix: str      # everything on the __str__ line before the value
+    hexFmt: str
+    extra: object    # UUID field name tuple or _special_dict class
+
 # Based on Gen-Z revision 1.1 final
 
 reqPgPteUUID = UUID(hex='d2b57c49a98c42e68118f75aadbeb69c')
@@ -2209,6 +2220,55 @@ class DROpcodes(Opcodes):
     _inverted_map = {v : k for k, v in _map.items()}
     _list = sorted(_map.items(), key=lambda x: x[1])
 
+class ControlTypeCache():
+    '''Memoize the ctypes classes that the ControlTable subclasses and
+    structure factories build in fileToStructInit()/from_buffer_kw(),
+    so loading the same kind of table again (e.g., the LPRT of every
+    switch port) reuses one class instead of creating another.
+
+    Classes are keyed on their name, bases and class attributes (with
+    _fields_ as a tuple). 'verbosity' is part of the key, since table
+    elements read it from their class.
+    '''
+    def __init__(self):
+        self._types = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._types)
+
+    def clear(self):
+        self._types.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _freeze(val):
+        if isinstance(val, list):
+            return tuple(ControlTypeCache._freeze(v) for v in val)
+        if isinstance(val, property):  # PTE properties are built per call
+            return (property, val.fget, val.fset)
+        return val
+
+    def type(self, name, bases, attrs):
+        key = (name, bases, tuple(sorted(
+            (k, self._freeze(v)) for k, v in attrs.items())))
+        try:
+            cls = self._types[key]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            cls = type(name, bases, attrs)
+            self._types[key] = cls
+        return cls
+
+    def __str__(self):
+        return 'ControlTypeCache: {} types, {} hits, {} misses'.format(
+            len(self), self.hits, self.misses)
+
+controlTypeCache = ControlTypeCache()
+
 class ControlStructureMap(LittleEndianStructure):
     _map = {  'CoreStructure'                       : 0x00,
               'OpCodeSetStructure'                  : 0x01,
@@ -2322,7 +2382,13 @@ class ControlStructureMap(LittleEndianStructure):
         return self._inverted_map[id]
 
     def fileToStruct(self, file, data, verbosity=0, fd=None, path=None,
-                     parent=None, core=None, offset=0, size=None):
+                     parent=None, core=None, offset=0, size=None, lazy=False):
+        if lazy:
+            # data is ignored - table rows are read on first access
+            # (see ControlTableArray.load()), so only the size is needed now
+            if size is None:
+                size = path.stat().st_size
+            data = bytearray(size)
         try:
             # first try file as a file name, e.g., 'core'
             struct = globals()[self._struct[file]].from_buffer_kw(data, offset,
@@ -2330,19 +2396,26 @@ class ControlStructureMap(LittleEndianStructure):
         except KeyError:
             # next try file as a structure name, e.g., 'CoreStructure'
             struct = globals()[file].from_buffer_kw(data, offset, parent=parent)
+        if lazy and not isinstance(struct, ControlTableArray):
+            raise ValueError('lazy loading requires a table, not {}'.format(
+                type(struct).__name__))
         struct.data = data
         struct.offset = offset
         struct.verbosity = verbosity
         struct.fd = fd
+        struct._file = None
         struct.path = path
         struct.parent = parent
         struct.core = core
         struct._stat = None
         struct._size = size
         struct.fileToStructInit()
+        if lazy:
+            struct._loaded = set()
         return struct
 
     def set_fd(self, f):
+        self._file = f
         self.fd = f.fileno()
 
 def add_from_buffer_kw(cls):
@@ -2411,92 +2484,151 @@ class ControlStructure(ControlStructureMap):
                                      verbosity=self.verbosity)
         return None
 
-    def bitField(self, width, bitOffset):
+    @staticmethod
+    def bitField(width, bitOffset):
         byteOffset = bitOffset // 64 * 8
         lowBit = bitOffset % 64
         highBit = lowBit + width - 1
         hexWidth = (width + 3) // 4
         return (byteOffset, highBit, lowBit, hexWidth)
 
-    def __str__(self):
-        r = '{}'.format(type(self).__name__)
-        if self.verbosity < 2:
-            return r
-        r += ':\n'
-        max_len = max(len(field[0]) for field in self._fields_)
+    # kinds of field in a FieldLayout
+    FIELD, RSVD, UUID, ARRAY = range(4)
+
+    @classmethod
+    def layout(cls):
+        '''Return the per-class FieldLayout used by __str__/__repr__,
+        building it on first use.
+        '''
+        try:
+            return cls.__dict__['_layout']
+        except KeyError:
+            pass
+        fields = []
+        max_len = max(len(field[0]) for field in cls._fields_)
+        uuid_dict = getattr(cls, '_uuid_dict', {})
+        special_dict = getattr(cls, '_special_dict', {})
         bitOffset = 0
         skipNext = False
-        for field in self._fields_:
+        for field in cls._fields_:
             name = field[0]
-            try:
-                width = field[2]
-            except IndexError:
-                width = 0
+            width = field[2] if len(field) > 2 else 0
             if skipNext:
                 bitOffset += width
                 skipNext = False
                 continue
-            byteOffset, highBit, lowBit, hexWidth = self.bitField(width, bitOffset)
-            if self.Size > 0 and byteOffset >= self.Size * 16:
-                break
-            uu = self.isUuid(name)
-            if uu is not None:
-                r += '    {0:{nw}}@0x{1:0>3x} = {2}\n'.format(
-                    name[:-1], byteOffset, uu, nw=max_len)
+            byteOffset, highBit, lowBit, hexWidth = cls.bitField(width,
+                                                                 bitOffset)
+            uuid_tuple = uuid_dict.get(name)
+            if uuid_tuple is not None:
+                kind, label, extra = cls.UUID, name[:-1], uuid_tuple
+                prefix = '    {0:{nw}}@0x{1:0>3x} = '.format(
+                    label, byteOffset, nw=max_len)
                 skipNext = True
             elif width == 0:
-                arrayStr = textwrap.indent(str(self.embeddedArray), '  ')
-                r += '    {0:{nw}}@0x{1:0>3x} = {2}\n'.format(
-                    name, byteOffset, arrayStr[2:], nw=max_len)
+                kind, label, extra = cls.ARRAY, name, None
+                prefix = '    {0:{nw}}@0x{1:0>3x} = '.format(
+                    name, byteOffset, nw=max_len)
             else:
-                if rv_re.match(name) is not None and self.verbosity < 6:
-                    bitOffset += width
-                    continue
-                r += '    {0:{nw}}@0x{1:0>3x}{{{2:2}:{3:2}}} = 0x{4:0>{hw}x}\n'.format(
-                    name, byteOffset, highBit, lowBit,
-                    getattr(self, name),
-                    nw=max_len, hw=hexWidth)
-                if self.verbosity < 3:
-                    bitOffset += width
-                    continue
-                special = self.isSpecial(name)
-                if special is not None:
+                kind = cls.RSVD if rv_re.match(name) is not None else cls.FIELD
+                label, extra = name, special_dict.get(name)
+                prefix = '    {0:{nw}}@0x{1:0>3x}{{{2:2}:{3:2}}} = 0x'.format(
+                    name, byteOffset, highBit, lowBit, nw=max_len)
+            fields.append(FieldLayout(kind, name, label, byteOffset, prefix,
+                                      '0>{}x'.format(hexWidth), extra))
+            bitOffset += width
+        # end for field
+        layout = tuple(fields)
+        setattr(cls, '_layout', layout)
+        return layout
+
+    def __str__(self):
+        r = '{}'.format(type(self).__name__)
+        if self.verbosity < 2:
+            return r
+        lines = [r + ':\n']
+        end = self.Size * 16 if self.Size > 0 else None
+        rsvd = self.verbosity >= 6
+        specials = self.verbosity >= 3
+        for fld in self.layout():
+            if end is not None and fld.byteOffset >= end:
+                break
+            kind = fld.kind
+            if kind == self.UUID:
+                lines.append('{}{}\n'.format(fld.prefix, self.uuid(fld.extra)))
+            elif kind == self.ARRAY:
+                arrayStr = textwrap.indent(str(self.embeddedArray), '  ')
+                lines.append('{}{}\n'.format(fld.prefix, arrayStr[2:]))
+            elif kind == self.FIELD or rsvd:
+                lines.append('{}{}\n'.format(
+                    fld.prefix, format(getattr(self, fld.name), fld.hexFmt)))
+                if specials and fld.extra is not None:
+                    special = fld.extra(getattr(self, fld.name), self,
+                                        verbosity=self.verbosity)
                     specialStr = textwrap.fill(
                         str(special), expand_tabs=False, width=cols,
                         initial_indent='      ', subsequent_indent='      ')
                     if specialStr != '':
-                        r += '{}\n'.format(specialStr)
-            bitOffset += width
-        # end for field
-        return r
+                        lines.append('{}\n'.format(specialStr))
+        # end for fld
+        return ''.join(lines)
 
     def __repr__(self):
-        r = type(self).__name__ + '('
-        l = len(self._fields_)
-        skipNext = False
-        for i, field in enumerate(self._fields_, start=1):
-            if skipNext:
-                skipNext = False
-                if i == l:
-                    r += ')'
-                continue
-            name = field[0]
-            try:
-                width = field[2]
-            except IndexError:
-                width = 0
-            uu = self.isUuid(name)
-            if uu is not None:
-                fmt = '{}={}, ' if i < l else '{}={})'
-                r += fmt.format(name[:-1], uu)
-                skipNext = True
-            elif width == 0:
-                r += repr(self.embeddedArray)
-                #set_trace() # Revisit: temp debug
+        parts = []
+        for fld in self.layout():
+            if fld.kind == self.UUID:
+                parts.append('{}={}, '.format(fld.label, self.uuid(fld.extra)))
+            elif fld.kind == self.ARRAY:
+                parts.append(repr(self.embeddedArray))
             else:
-                fmt = '{}=0x{:x}, ' if i < l else '{}=0x{:x})'
-                r += fmt.format(name, getattr(self, name))
-        return r
+                parts.append('{}=0x{:x}, '.format(fld.name,
+                                                  getattr(self, fld.name)))
+        # the final field ends with ')' rather than ', '
+        if len(parts) > 0 and self.layout()[-1].kind != self.ARRAY:
+            parts[-1] = parts[-1][:-2] + ')'
+        return type(self).__name__ + '(' + ''.join(parts)
+
+    def to_json(self, fields=None):
+        '''Return a dict of field values, for JSON encoding. Reserved
+        fields are omitted; if "fields" is not None, only those fields
+        are included.
+        '''
+        jd = {}
+        size = getattr(self, 'Size', 0)  # table elements have no Size
+        end = size * 16 if size > 0 else None
+        for fld in self.layout():
+            if end is not None and fld.byteOffset >= end:
+                break
+            if fields is not None and fld.label not in fields:
+                continue
+            kind = fld.kind
+            if kind == self.UUID:
+                jd[fld.label] = str(self.uuid(fld.extra))
+            elif kind == self.ARRAY:
+                array = getattr(self, 'embeddedArray', None)
+                jd[fld.name] = array.to_json() if array is not None else None
+            elif kind == self.FIELD:
+                jd[fld.name] = getattr(self, fld.name)
+        # end for fld
+        return jd
+
+    @classmethod
+    def field_range(cls, *names):
+        '''Return (offset, size) of the bytes holding fields "names"'''
+        types = {field[0]: field[1] for field in cls._fields_}
+        start = min(getattr(cls, name).offset for name in names)
+        end = max(getattr(cls, name).offset + sizeof(types[name])
+                  for name in names)
+        return (start, end - start)
+
+    def read_fields(self, *names):
+        '''Re-read only the bytes holding fields "names" from self.fd,
+        with one pread. Returns (offset, size) of the bytes read.
+        '''
+        off, sz = self.field_range(*names)
+        off += self.offset
+        self.data[off:off+sz] = os.pread(self.fd, sz, off)
+        return (off, sz)
 
     def fileToStructInit(self):
         pass
@@ -2520,16 +2652,53 @@ class ControlTable(ControlStructure):
 # for PATable, RIT, SSAP, MCAP, MSAP, MSMCAP,
 # CAccessRKeyTable, CAccessLP2PTable, PGTable, PTETable, ServiceUUIDTable
 class ControlTableArray(ControlTable):
+    # set of rows already read, or None if the whole table is in self.data
+    _loaded = None
+
     def cs_offset(self, row, *unused):
         return sizeof(self.element) * row
 
+    def pread(self, sz, off):
+        # callers set_fd() to the open control file before touching rows;
+        # a bare fd number may since have been closed and reused, so only
+        # trust a file object that is still open, else reopen self.path
+        f = self._file
+        if f is None or f.closed:
+            with self.path.open(mode='rb', buffering=0) as f:
+                return os.pread(f.fileno(), sz, off)
+        return os.pread(f.fileno(), sz, off)
+
+    def load(self, row=None):
+        '''For a lazy table, read "row" (or the entire table, if None)
+        from the control file into self.data. Rows already read are not
+        re-read, so changes the caller made to a loaded row are preserved.
+        '''
+        if self._loaded is None:
+            return
+        stride = sizeof(self.array._type_)
+        if row is None:
+            data = bytearray(self.pread(len(self.data), 0))
+            for i in self._loaded:
+                data[i*stride:(i+1)*stride] = self.data[i*stride:(i+1)*stride]
+            self.data[:] = data
+            self._loaded = None
+            return
+        row %= len(self.array)
+        if row not in self._loaded:
+            off = stride * row
+            self.data[off:off+stride] = self.pread(stride, off)
+            self._loaded.add(row)
+
     def __getitem__(self, key):
+        if self._loaded is not None:
+            self.load(key if isinstance(key, int) else None)
         return self.array[key]
 
     def __len__(self):
         return len(self.array)
 
     def __iter__(self):
+        self.load()
         return iter(self.array)
 
     def __str__(self):
@@ -2539,7 +2708,8 @@ class ControlTableArray(ControlTable):
         r += ':\n'
         if self.verbosity < 4:
             return r
-        elif self.verbosity == 4:
+        self.load()
+        if self.verbosity == 4:
             name = type(self.array[0]).__name__
             hasV = hasattr(self.array[0], 'V')
             for i in range(len(self)):
@@ -2558,8 +2728,12 @@ class ControlTableArray(ControlTable):
         return r
 
     def __repr__(self):
+        self.load()
         return repr(self.array)
 
+    def to_json(self, fields=None):
+        return [elem.to_json(fields) for elem in self]
+
 # for RequesterVCAT, ResponderVCAT, VCAT, SSDT, MSDT, LPRT, MPRT
 class ControlTable2DArray(ControlTableArray):
     fullEntryWrite = True
@@ -2582,7 +2756,8 @@ class ControlTable2DArray(ControlTableArray):
         r += ':\n'
         if self.verbosity < 4:
             return r
-        elif self.verbosity == 4:
+        self.load()
+        if self.verbosity == 4:
             name = type(self.array[0][0]).__name__
             hasV = hasattr(self.array[0][0], 'V')
             for i in range(self.rows):
@@ -2604,6 +2779,9 @@ class ControlTable2DArray(ControlTableArray):
 
         return r
 
+    def to_json(self, fields=None):
+        return [[elem.to_json(fields) for elem in row] for row in self]
+
 #Revisit: jmh - this is version independent
 class ControlHeader(ControlStructure):
     _fields_ = [('Type',          c_u64, 12),
@@ -3016,9 +3194,9 @@ class OpCodeSetTableFactory(ControlTable):
                 fields = OpCodeSetTableTemplate._fields + OpCodeSetTableTemplate._v0_fields
             else:
                 fields = OpCodeSetTableTemplate._fields + OpCodeSetTableTemplate._v1_fields
-        OpCodeSet = type('OpCodeSetTable',
-                         (OpCodeSetTableTemplate,), {'_fields_': fields,
-                                                     'Size': sz})
+        OpCodeSet = controlTypeCache.type('OpCodeSetTable',
+                                          (OpCodeSetTableTemplate,), {'_fields_': fields,
+                                                                      'Size': sz})
         return OpCodeSet.from_buffer(data, offset)
 
 class OpCodeSetTable(ControlTable):
@@ -3198,9 +3376,9 @@ class InterfaceFactory(ControlStructure):
             fields = InterfaceTemplate._fields + InterfaceTemplate._optional_fields
         else:
             fields = InterfaceTemplate._fields
-        Interface = type('InterfaceStructure',
-                         (InterfaceTemplate,), {'_fields_': fields,
-                                                'Size': sz})
+        Interface = controlTypeCache.type('InterfaceStructure',
+                                          (InterfaceTemplate,), {'_fields_': fields,
+                                                                 'Size': sz})
         return Interface.from_buffer(data, offset)
 
 class InterfaceStructure(ControlStructure):
@@ -3567,9 +3745,9 @@ class MaxSIClassArray(ControlTableArray):
         fields = [('Class',              c_u32, 16),
                   ('MaxSI',              c_u32, 16),
                   ]
-        MaxSIClass = type('MaxSIClass', (ControlTableElement,), {'_fields_': fields,
-                                                             'verbosity': self.verbosity,
-                                                             'Size': 4}) # Revisit
+        MaxSIClass = controlTypeCache.type('MaxSIClass', (ControlTableElement,), {'_fields_': fields,
+                                                                              'verbosity': self.verbosity,
+                                                                              'Size': 4}) # Revisit
         elems = self.parent.SUUIDTableSz
         self.array = (MaxSIClass * elems).from_buffer(self.data, self.offset)
         self.element = MaxSIClass
@@ -3605,10 +3783,10 @@ class ServiceUUIDFactory(ControlStructure):
         serv = ServiceUUIDStructure.from_buffer(data, offset)
         elems = serv.sz_0_special(serv.SUUIDTableSz, 16)
         fields = ServiceUUIDTemplate._fields + ServiceUUIDTemplate._arr
-        ServeUUID = type('ServiceUUIDStructure',
-                         (ServiceUUIDTemplate,), {'_fields_': fields,
-                                                  'arrElems': elems,
-                                                  'Size': sz})
+        ServeUUID = controlTypeCache.type('ServiceUUIDStructure',
+                                          (ServiceUUIDTemplate,), {'_fields_': fields,
+                                                                   'arrElems': elems,
+                                                                   'Size': sz})
         return ServeUUID.from_buffer(data, offset)
 
 class ServiceUUIDStructure(ControlStructure):
@@ -3629,9 +3807,9 @@ class BaseLenArray(ControlTableArray):
                   ('CSLen',                      c_u64, 40), #0x18
                   ('R3',                         c_u64, 24),
                   ]
-        BaseLen = type('BaseLen', (ControlTableElement,), {'_fields_': fields,
-                                                        'verbosity': self.verbosity,
-                                                        'Size': 32}) # Revisit
+        BaseLen = controlTypeCache.type('BaseLen', (ControlTableElement,), {'_fields_': fields,
+                                                                         'verbosity': self.verbosity,
+                                                                         'Size': 32}) # Revisit
         #set_trace() # Revisit: temp debug
         elems = self.parent.arrElems # parent is ServiceUUIDTableElement
         self.array = (BaseLen * elems).from_buffer(self.data, self.offset)
@@ -3671,12 +3849,12 @@ class ServiceUUIDTableElementFactory(ControlTable):
         #set_trace() # Revisit: temp debug
         fields = (ServiceUUIDTableElementTemplate._fields +
                   ServiceUUIDTableElementTemplate._arr)
-        ServUUIDElem = type('ServiceUUIDTableElement',
-                            (ServiceUUIDTableElementTemplate,),
-                            {'_fields_': fields,
-                             'arrElems': elems,
-                             'verbosity': verbosity,
-                             'Size': sz})
+        ServUUIDElem = controlTypeCache.type('ServiceUUIDTableElement',
+                                             (ServiceUUIDTableElementTemplate,),
+                                             {'_fields_': fields,
+                                              'arrElems': elems,
+                                              'verbosity': verbosity,
+                                              'Size': sz})
         return ServUUIDElem.from_buffer(data, offset)
 
 @add_from_buffer_kw
@@ -3766,9 +3944,9 @@ class PATable(ControlTableArray):
                   ('MetaRdWrEnb',        c_u16,  1),
                   ('Rv4',                c_u16,  4),
         ]
-        PA = type('PA', (ControlTableElement,), {'_fields_': fields,
-                                              'verbosity': self.verbosity,
-                                              'Size': 2}) # Revisit
+        PA = controlTypeCache.type('PA', (ControlTableElement,), {'_fields_': fields,
+                                                               'verbosity': self.verbosity,
+                                                               'Size': 2}) # Revisit
         items = self.Size // sizeof(PA)
         self.array = (PA * items).from_buffer(self.data)
         self.element = PA
@@ -3778,9 +3956,9 @@ class RKDArray(ControlTableArray):
         super().fileToStructInit()
         fields = [('RKDAuth',  c_u64, 64)
         ]
-        RKD = type('RKD', (ControlTableElement,), {'_fields_': fields,
-                                                   'verbosity': self.verbosity,
-                                                   'Size': 8}) # Revisit
+        RKD = controlTypeCache.type('RKD', (ControlTableElement,), {'_fields_': fields,
+                                                                    'verbosity': self.verbosity,
+                                                                    'Size': 8}) # Revisit
         items = 64 # always 64 elements
         self.array = (RKD * items).from_buffer(self.data, self.offset)
         self.element = RKD
@@ -3828,9 +4006,9 @@ class IStatsVCArray(ControlTableArray):
                   ('TotalRecvBytes',             c_u64, 64), #0x68/0xA8
                   ('Occupancy',                  c_u64, 64), #0x70/0xB0
                   ]
-        IStatsVC = type('IStatsVC', (ControlTableElement,), {'_fields_': fields,
-                                                             'verbosity': self.verbosity,
-                                                             'Size': 40}) # Revisit
+        IStatsVC = controlTypeCache.type('IStatsVC', (ControlTableElement,), {'_fields_': fields,
+                                                                              'verbosity': self.verbosity,
+                                                                              'Size': 40}) # Revisit
         sz = self.Size - self.parent.relayOff
         items = sz // 40
         self.array = (IStatsVC * items).from_buffer(self.data, self.offset)
@@ -3886,14 +4064,15 @@ class InterfaceStatisticsTemplate(ControlStructure):
 
     @staticmethod
     def fields_relay_offset(cls, cap1):
+        # copy cls._fields, since callers extend the returned list
         if cap1.ProvisionedStatsFields == ProvisionedIStats.Common:
-            fields = cls._fields
+            fields = list(cls._fields)
             relay_offset = 0
         elif cap1.ProvisionedStatsFields == ProvisionedIStats.CommonReqRsp:
             fields = cls._fields + cls._req_rsp
             relay_offset = 0
         elif cap1.ProvisionedStatsFields == ProvisionedIStats.CommonPktRelay:
-            fields = cls._fields
+            fields = list(cls._fields)
             relay_offset = cls._relay_offset[0]
         else:  # CommonReqRspPktRelay
             fields = cls._fields + cls._req_rsp
@@ -3923,11 +4102,11 @@ class InterfaceStatisticsFactory(ControlStructure):
         if relay_offset > 0:
             elems = (sz - relay_offset) // (5 * 8) # Revisit: hardcoded value
             fields.extend(InterfaceStatisticsTemplate._vc_arr)
-        InterfaceStats = type('InterfaceStatisticsStructure',
-                         (InterfaceStatisticsTemplate,), {'_fields_': fields,
-                                                          'relayOff': relay_offset,
-                                                          'vcElems': elems,
-                                                          'Size': sz})
+        InterfaceStats = controlTypeCache.type('InterfaceStatisticsStructure',
+                                          (InterfaceStatisticsTemplate,), {'_fields_': fields,
+                                                                           'relayOff': relay_offset,
+                                                                           'vcElems': elems,
+                                                                           'Size': sz})
         return InterfaceStats.from_buffer(data, offset)
 
 class InterfaceStatisticsStructure(ControlStructure):
@@ -3965,11 +4144,11 @@ class ISnapshotFactory(ControlTable):
         if relay_offset > 0:
             elems = (sz - relay_offset) // (5 * 8) # Revisit: hardcoded value
             fields.extend(ISnapshotTemplate._vc_arr)
-        ISnapshot = type('ISnapshotTable',
-                         (ISnapshotTemplate,), {'_fields_': fields,
-                                                          'relayOff': relay_offset,
-                                                          'vcElems': elems,
-                                                          'Size': sz})
+        ISnapshot = controlTypeCache.type('ISnapshotTable',
+                                          (ISnapshotTemplate,), {'_fields_': fields,
+                                                                           'relayOff': relay_offset,
+                                                                           'vcElems': elems,
+                                                                           'Size': sz})
         return ISnapshot.from_buffer(data, offset)
 
 class ISnapshotTable(ControlTable):
@@ -3985,9 +4164,9 @@ class RequesterVCATTable(ControlTable2DArray):
         if self.parent.HCS:
             fields.extend([('TH', c_u32, 7), ('R0', c_u32, 25)])
             sz = 8
-        VCAT = type('VCAT', (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': sz})
+        VCAT = controlTypeCache.type('VCAT', (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': sz})
         rows = 16  # always 16 rows
         cols = self.sz_0_special(self.parent.REQVCATSZ, 5)
         self.array = ((VCAT * cols) * rows).from_buffer(self.data)
@@ -4003,9 +4182,9 @@ class ResponderVCATTable(ControlTable2DArray):
         if self.parent.HCS:
             fields.extend([('TH', c_u32, 7), ('R0', c_u32, 25)])
             sz = 8
-        VCAT = type('VCAT', (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': sz})
+        VCAT = controlTypeCache.type('VCAT', (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': sz})
         items = self.Size // sizeof(VCAT)
         cols = self.sz_0_special(self.parent.RSPVCATSZ, 5)
         rows = items // cols
@@ -4022,9 +4201,9 @@ class VCATTable(ControlTable2DArray):
         if self.core.sw.HCS:
             fields.extend([('TH', c_u32, 7), ('R0', c_u32, 25)])
             sz = 8
-        VCAT = type('VCAT', (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': sz})
+        VCAT = controlTypeCache.type('VCAT', (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': sz})
         items = self.Size // sizeof(VCAT)
         cols = self.sz_0_special(self.core.sw.UVCATSZ, 5)
         rows = items // cols
@@ -4041,9 +4220,9 @@ class RITTable(ControlTableArray):
         # MaxInterface, RITPadSize, etc.
         fields = [('EIM',       c_u32, 32)
         ]
-        RIT = type('RIT', (ControlTableElement,), {'_fields_': fields,
-                                                'verbosity': self.verbosity,
-                                                'Size': 4}) # Revisit
+        RIT = controlTypeCache.type('RIT', (ControlTableElement,), {'_fields_': fields,
+                                                                 'verbosity': self.verbosity,
+                                                                 'Size': 4}) # Revisit
         items = self.Size // sizeof(RIT)
         self.array = (RIT * items).from_buffer(self.data)
         self.element = RIT
@@ -4059,9 +4238,9 @@ class SSDTMSDTLPRTMPRTTable(ControlTable2DArray):
                   ('VCA',       c_u32,  5),
                   ('EI',        c_u32, 12),
         ]
-        SSDT = type(self._name, (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': 4})
+        SSDT = controlTypeCache.type(self._name, (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': 4})
         rows = self.rows
         cols = self.cols
         self.array = ((SSDT * cols) * rows).from_buffer(self.data)
@@ -4074,7 +4253,8 @@ class SSDTMSDTLPRTMPRTTable(ControlTable2DArray):
         r += ':\n'
         if self.verbosity < 4:
             return r
-        elif self.verbosity == 4:
+        self.load()
+        if self.verbosity == 4:
             name = type(self.array[0][0]).__name__
             for i in range(self.rows):
                 v0 = self.array[i][0].V
@@ -4186,9 +4366,9 @@ class SSAPMCAPMSAPMSMCAPTable(ControlTableArray):
             fields.append(('ACRSP',       c_u32,  2))
         if pad_sz > 0:
             fields.append(('Pad',         c_u32,  pad_sz))
-        SSAP = type(self._name, (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': 4})
+        SSAP = controlTypeCache.type(self._name, (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': 4})
         items = self.Size // sizeof(SSAP)
         self.array = (SSAP * items).from_buffer(self.data)
         self.element = SSAP
@@ -4224,9 +4404,9 @@ class CAccessRKeyTable(ControlTableArray):
         fields = [('RORKey',      c_u64, 32),
                   ('RWRKey',      c_u64, 32),
         ]
-        RKey = type('RKey', (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': 8})
+        RKey = controlTypeCache.type('RKey', (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': 8})
         items = self.Size // sizeof(RKey)
         self.array = (RKey * items).from_buffer(self.data)
         self.element = RKey
@@ -4240,9 +4420,9 @@ class CAccessLP2PTable(ControlTableArray):
                   ('P2PAC',       c_u8,  3),
                   ('Rv',          c_u8,  2),
         ]
-        LP2P = type('LP2P', (ControlTableElement,), {'_fields_': fields,
-                                                  'verbosity': self.verbosity,
-                                                  'Size': 1})
+        LP2P = controlTypeCache.type('LP2P', (ControlTableElement,), {'_fields_': fields,
+                                                                   'verbosity': self.verbosity,
+                                                                   'Size': 1})
         items = self.Size // sizeof(LP2P)
         self.array = (LP2P * items).from_buffer(self.data)
         self.element = LP2P
@@ -4258,9 +4438,9 @@ class PGTable(ControlTableArray):
                   ('PageCount',   c_u64, 24),
                   ('BasePTEIdx',  c_u64, 32),
         ]
-        PG = type('PG', (ControlTableElement,), {'_fields_': fields,
-                                              'verbosity': self.verbosity,
-                                              'Size': 16})
+        PG = controlTypeCache.type('PG', (ControlTableElement,), {'_fields_': fields,
+                                                               'verbosity': self.verbosity,
+                                                               'Size': 16})
         items = self.Size // sizeof(PG)
         self.array = (PG * items).from_buffer(self.data)
         self.element = PG
@@ -4478,7 +4658,7 @@ class PTETable(ControlTableArray):
         if needADDR:
             pte_dict['addr_l_bits'] = needADDR
             pte_dict['ADDR'] = property(pte_addr_get, pte_addr_set)
-        PTE = type('{}PTE'.format(pfx), (ControlTableElement,), pte_dict)
+        PTE = controlTypeCache.type('{}PTE'.format(pfx), (ControlTableElement,), pte_dict)
         items = self.Size // sizeof(PTE)
         self.array = (PTE * items).from_buffer(self.data)
         self.element = PTE
@@ -4559,6 +4739,65 @@ class UEPEventRecord(ControlTable):
     def Size(self):
         return 20
 
+class PktTypeCache():
+    '''Memoize the ctypes packet classes built by the *Base.pkt_type()
+    static methods, so decoding a packet only costs a from_buffer().
+
+    Classes are keyed on (pkt_type, className, GC, NH, RK/RT, payload
+    length bucket). The cached classes are shared by every packet of
+    that layout, so their 'data' and 'verbosity' class attributes are
+    only defaults - each instance sets its own.
+    '''
+    def __init__(self):
+        self._types = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._types)
+
+    def clear(self):
+        self._types.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def memoize(self, payload: bool = True):
+        def decorator(pkt_type):
+            # the 5th positional arg is RK or RT, depending on the packet
+            def cached_pkt_type(className: str, payLen: int, GC: bool = False,
+                                NH: bool = False, *args, data = None,
+                                verbosity = 0, pktLen: int = None, **kwargs):
+                if not payload:
+                    bucket = None
+                elif pktLen is None:
+                    bucket = ceil_div(payLen, 4)
+                else:
+                    bucket = -pktLen
+                flag = any(args) or any(kwargs.values())
+                key = (pkt_type, className, bool(GC), bool(NH), flag, bucket)
+                try:
+                    val = self._types[key]
+                    self.hits += 1
+                except KeyError:
+                    self.misses += 1
+                    if pktLen is not None:
+                        kwargs['pktLen'] = pktLen
+                    val = pkt_type(className, payLen, GC, NH, *args,
+                                   **kwargs)
+                    self._types[key] = val
+                return val
+
+            cached_pkt_type.__doc__ = pkt_type.__doc__
+            return cached_pkt_type
+
+        return decorator
+
+    def __str__(self):
+        return 'PktTypeCache: {} types, {} hits, {} misses'.format(
+            len(self), self.hits, self.misses)
+
+pktTypeCache = PktTypeCache()
+
 class Packet(LittleEndianStructure):
     _ocl = OpClasses()
 
@@ -4649,7 +4888,8 @@ def PacketFactory(oclName: str, opcName: str, payLen: int = 0,
     return pkt
 
 class ExplicitHdr(Packet):
-    ecrc = crcmod.mkCrcFun(0xade27a<<1|1, initCrc=0, xorOut=0xffffff, rev=True)
+    ecrc_poly = 0xade27a<<1|1
+    ecrc = crcmod.mkCrcFun(ecrc_poly, initCrc=0, xorOut=0xffffff, rev=True)
 
     # pcrc_table generated by pycrc and hand-converted to python:
     # pycrc.py --width 6 --poly 0x2f --reflect-in 1 --reflect-out 1 \
@@ -4810,7 +5050,8 @@ class ExplicitHdr(Packet):
         return ''
 
     def compute_ecrc(self) -> int:
-        return ExplicitHdr.ecrc(bytearray(self)[0:self.LEN*4-3])
+        # memoryview avoids copying the whole packet just to slice it
+        return ExplicitHdr.ecrc(memoryview(self).cast('B')[0:self.LEN*4-3])
 
     def chk_ecrc(self, crc=None) -> int:
         if crc is None:
@@ -4945,6 +5186,7 @@ class Core64ReadBase(ExplicitReqHdr, Core64ReadWriteMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0):
         fields = ExplicitReqHdr.hd_fields + Core64ReadBase.os1_fields
@@ -5002,6 +5244,7 @@ class Core64ReadResponseBase(ExplicitHdr):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + Core64ReadResponseBase.os1_fields
@@ -5079,6 +5322,7 @@ class Core64WriteBase(ExplicitReqHdr, Core64ReadWriteMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitReqHdr.hd_fields + Core64WriteBase.os1_fields
@@ -5161,6 +5405,7 @@ class Core64WritePartialBase(ExplicitReqHdr, Core64ReadWriteMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitReqHdr.hd_fields + Core64WritePartialBase.os1_fields
@@ -5244,6 +5489,7 @@ class Core64StandaloneAckBase(ExplicitHdr):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0):
         fields = ExplicitHdr.hd_fields + Core64StandaloneAckBase.os1_fields
@@ -5340,6 +5586,7 @@ class ControlReadBase(ExplicitHdr, ControlReadWriteMixin):
     _uuid_fields = [('MGRUUID0', 'MGRUUID1', 'MGRUUID2', 'MGRUUID3')]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0):
         fields = ExplicitHdr.hd_fields + ControlReadBase.os1_fields
@@ -5426,6 +5673,7 @@ class ControlWriteBase(ExplicitHdr, ControlReadWriteMixin):
     _uuid_fields = [('MGRUUID0', 'MGRUUID1', 'MGRUUID2', 'MGRUUID3')]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + ControlWriteBase.os1_fields
@@ -5522,6 +5770,7 @@ class ControlWritePartialBase(ExplicitHdr, ControlReadWriteMixin):
     _uuid_fields = [('MGRUUID0', 'MGRUUID1', 'MGRUUID2', 'MGRUUID3')]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + ControlWritePartialBase.os1_fields
@@ -5620,6 +5869,7 @@ class ControlUnsolicitedEventBase(ExplicitHdr):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + ControlUnsolicitedEventBase.os1_fields
@@ -5772,6 +6022,7 @@ class CtxIdWriteMSGBase(ExplicitHdr, WriteMsgMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RT:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + CtxIdWriteMSGBase.os1_fields
@@ -5887,6 +6138,7 @@ class ControlWriteMSGBase(ExplicitHdr, WriteMsgMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + ControlWriteMSGBase.os1_fields
@@ -6093,6 +6345,7 @@ class MulticastUnrelWriteMSGBase(MulticastHdr, WriteMsgMixin):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize()
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RT:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = MulticastHdr.hd_fields + MulticastUnrelWriteMSGBase.os1_fields
@@ -6187,6 +6440,7 @@ class Adv2PTREQBase(ExplicitHdr):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + Adv2PTREQBase.os1_fields
@@ -6269,6 +6523,7 @@ class Adv2PTRSPBase(ExplicitHdr):
                   ('ECRC',                       c_u32, 24)]
 
     @staticmethod
+    @pktTypeCache.memoize(payload=False)
     def pkt_type(className: str, payLen: int, GC:bool = False, NH:bool = False,
                  RK:bool = False, data = None, verbosity = 0, pktLen:int = None):
         fields = ExplicitHdr.hd_fields + Adv2PTRSPBase.os1_fields
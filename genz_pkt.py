@@ -25,12 +25,33 @@ import argparse
 import os
 import ctypes
 import re
+import ast
+import heapq
+import bisect
+import mmap
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque, Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, accumulate
 from uuid import UUID
 from pathlib import Path
 from importlib import import_module
 from genz.genz_common import GCID
 from pdb import set_trace, post_mortem
 import traceback
+try:
+    import numpy as np
+    from genz.genz_crc import BatchCRC
+except ImportError:  # NumPy is only required for --crc-only and --export
+    np = None
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only required for --export to .parquet
+    pa = None
 
 re_ohb_first_match = re.compile('^time: (?P<time>0x[0-9a-fA-F]+)\s+' +
                                 '(?P<last>last )?data: (?P<user>0x[0-9a-fA-F]+)\s+' +
@@ -43,34 +64,61 @@ re_ohb_other_match = re.compile('^time: (?P<time>0x[0-9a-fA-F]+)\s+' +
                                 '(?P<data>.*)')
 re_zmmu_match = re.compile('^Starting .*ZMMU .*Dump$')
 
+FOLLOW_POLL = 0.2      # seconds between --follow checks for new input
+REORDER_WINDOW = 1024  # default --window (packets)
+
 class PacketSorter():
-    def __init__(self):
-        self.sorter = {}
+    def __init__(self, limit: int = 0):
+        self.sorter = {}  # uniqueness -> requests, sorted by cycle
+        self.cycles = {}  # uniqueness -> request cycles, for bisect
+        self.limit = limit  # max requests retained (0 = unlimited)
+        self.fifo = deque()
 
     def append(self, pkt):
         pkt.sorter = self
         if pkt.isRequest:
             uniq = pkt.uniqueness
-            self.sorter.setdefault(uniq, []).append(pkt)
+            pkt_list = self.sorter.setdefault(uniq, [])
+            cycles = self.cycles.setdefault(uniq, [])
+            i = bisect.bisect_right(cycles, pkt.cycle)
+            cycles.insert(i, pkt.cycle)
+            pkt_list.insert(i, pkt)
+            if self.limit:
+                self.fifo.append(pkt)
+                if len(self.fifo) > self.limit:
+                    self.remove(self.fifo.popleft())
+
+    def remove(self, pkt) -> bool:
+        uniq = pkt.uniqueness
+        cycles = self.cycles.get(uniq)
+        if cycles is None:
+            return False
+        pkt_list = self.sorter[uniq]
+        i = bisect.bisect_left(cycles, pkt.cycle)
+        while i < len(cycles) and cycles[i] == pkt.cycle:
+            if pkt_list[i] is pkt:
+                del cycles[i]
+                del pkt_list[i]
+                if len(cycles) == 0:
+                    del self.cycles[uniq]
+                    del self.sorter[uniq]
+                return True
+            i += 1
+        return False  # already expired or matched
 
     def find_request_packet(self, pkt):
         if pkt.isRequest:
             return pkt
         uniq = pkt.uniqueness
-        pkt_list = self.sorter.get(uniq)
-        if pkt_list is None:
+        cycles = self.cycles.get(uniq)
+        if cycles is None:
             return None
-        req = None
-        min_diff = None
-        for p in pkt_list:
-            diff = pkt.cycle - p.cycle
-            if diff < 0:
-                continue
-            elif min_diff is None or diff < min_diff:
-                min_diff = diff
-                req = p
-
-        return req
+        # nearest earlier request; first of any with the same cycle
+        i = bisect.bisect_right(cycles, pkt.cycle)
+        if i == 0:
+            return None
+        i = bisect.bisect_left(cycles, cycles[i - 1])
+        return self.sorter[uniq][i]
 
     def req_rsp_sort(self, pkt):
         if pkt.isRequest:
@@ -80,9 +128,570 @@ class PacketSorter():
             return (req.cycle + 1) if req is not None else pkt.cycle
 
 
-def parse_pkt_data(genz, args, matches, sorter):
+class LatencyHistogram():
+    '''Log-linear histogram of latencies in cycles: exact below 32, then
+    16 buckets per power of 2, so percentiles are within ~3% while
+    memory stays constant no matter how many samples are added.
+    '''
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, val: int):
+        e = max(val.bit_length() - 5, 0)
+        self.buckets[(e, val >> e)] += 1
+        self.count += 1
+        self.total += val
+        self.min = val if self.min is None else min(self.min, val)
+        self.max = val if self.max is None else max(self.max, val)
+
+    def percentile(self, pct: float) -> float:
+        target = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for (e, m) in sorted(self.buckets):
+            seen += self.buckets[(e, m)]
+            if seen >= target:
+                mid = (m << e) + ((1 << e) - 1) / 2
+                return min(max(mid, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+
+class LatencyStats():
+    '''Request->response latency histograms per request OpClass,
+    interface and DCID
+    '''
+    def __init__(self):
+        self.all = LatencyHistogram()
+        self.by_ocl = defaultdict(LatencyHistogram)
+        self.by_intf = defaultdict(LatencyHistogram)
+        self.by_dcid = defaultdict(LatencyHistogram)
+        self.unmatched = 0
+
+    def add(self, req, rsp):
+        lat = rsp.cycle - req.cycle
+        self.all.add(lat)
+        self.by_ocl[req.oclName].add(lat)
+        self.by_intf[req.user & 0xfff].add(lat)
+        self.by_dcid[req.DCID].add(lat)
+
+    def print(self, ns: bool = False):
+        unit = 'nS' if ns else 'uS'
+        scale = 2.5 if ns else 2.5e-3  # cycles are 2.5nS
+        tables = (('OpClass', self.by_ocl, '{}'),
+                  ('Intf', self.by_intf, '{:x}'),
+                  ('DCID', self.by_dcid, '{:03x}'))
+        for title, groups, fmt in tables:
+            print(f'Latency by {title} ({unit}):')
+            print(f'  {title:>12s} {"Count":>10s} {"Min":>12s} {"p50":>12s} '
+                  f'{"p99":>12s} {"Max":>12s} {"Mean":>12s}')
+            rows = [(fmt.format(key), groups[key]) for key in sorted(groups)]
+            for name, h in rows + [('All', self.all)]:
+                if h.count == 0:
+                    continue
+                print(f'  {name:>12s} {h.count:10d} {h.min*scale:12.3f} '
+                      f'{h.percentile(50)*scale:12.3f} '
+                      f'{h.percentile(99)*scale:12.3f} '
+                      f'{h.max*scale:12.3f} {h.mean*scale:12.3f}')
+        print(f'{self.all.count} responses matched, '
+              f'{self.unmatched} unmatched')
+
+
+class TrafficStats():
+    '''Packet and byte counts per interface, VC, OpClass/OpCode,
+    SGCID->DGCID pair and time interval, plus PCRC/ECRC failures and
+    response reasons. Everything is read from the raw packet bits;
+    packets are only decoded by PktLayouts to learn a new format.
+    '''
+    layout_cols = {'SSID': (('SSID',),),
+                   'DSID': (('DSID',), ('GMCP',)),
+                   'RRSPReason': (('RRSPReason',),),
+                   'Reason': (('Reason',),)}
+    reason_fields = ('RRSPReason', 'Reason')
+
+    def __init__(self, genz, interval: int):
+        fields = PktFilter.hdr_fields(genz.ExplicitReqHdr.hd_fields)
+        self.peek = eval('lambda H: ({OCL} << 5 | {OpCode}, {VC}, {LEN}, '
+                         '{SCID}, {DCID}, {GC})'.format(**fields), {})
+        self.layouts = PktLayouts(genz, self.layout_cols)
+        self.hdr_type = genz.ExplicitReqPkt
+        self.ecrc = genz.ExplicitHdr.ecrc
+        self.ocl = genz.Packet._ocl
+        self.interval = interval  # cycles
+        self.by_intf = defaultdict(lambda: [0, 0])
+        self.by_vc = defaultdict(lambda: [0, 0])
+        self.by_opcode = defaultdict(lambda: [0, 0])
+        self.by_pair = defaultdict(lambda: [0, 0])
+        self.by_time = defaultdict(lambda: [0, 0])
+        self.reasons = Counter()
+        self.pkts = 0
+        self.bad_pcrc = 0
+        self.bad_ecrc = 0
+
+    def opcode_name(self, code):
+        ocl, opcode = code >> 5, code & 0x1f
+        try:
+            return self.ocl.name(ocl) + self.ocl.opClass(ocl).name(opcode)
+        except KeyError:
+            return f'[{ocl:02x}:{opcode:02x}]'
+
+    def crc_chk(self, data, LEN):
+        '''Check the PCRC and ECRC of one packet without decoding it'''
+        pcrc_chk = self.hdr_type.from_buffer(data).chk_pcrc()
+        end = LEN * 4
+        if LEN == 0 or end > len(data):
+            return (pcrc_chk, -1)
+        crc = self.ecrc(data[0:end-3])
+        ECRC = int.from_bytes(data[end-3:end], 'little')
+        return (pcrc_chk, 0 if crc == ECRC else 1 if crc == 0xc0ffee else -1)
+
+    def add(self, hdr, decode, pcrc_chk=None, ecrc_chk=None):
+        '''Count one packet. "decode" turns the hdr tuple into a packet;
+        it is only called for a new packet format. The CRCs are checked
+        here unless batch results are passed in.
+        '''
+        cycle, user, data = hdr
+        H = int.from_bytes(data[0:PktFilter.hdr_bytes], 'little')
+        code, vc, LEN, scid, dcid, gc = self.peek(H)
+        key = self.layouts.key(H)
+        layout = self.layouts.get(key)
+        if layout is None:
+            layout = self.layouts.learn(key, decode(hdr))
+        if pcrc_chk is None:
+            pcrc_chk, ecrc_chk = self.crc_chk(data, LEN)
+        self.pkts += 1
+        self.bad_pcrc += pcrc_chk != 0
+        self.bad_ecrc += ecrc_chk != 0
+        if gc and 'SSID' in layout and 'DSID' in layout:
+            pair = (1, PktLayouts.value(data, layout['SSID']) << 12 | scid,
+                    PktLayouts.value(data, layout['DSID']) << 12 | dcid)
+        else:  # no GC, or Unknown packet without SSID/DSID
+            pair = (0, scid, dcid)
+        nbytes = LEN * 4
+        for table, key in ((self.by_intf, user & 0xfff),
+                           (self.by_vc, vc),
+                           (self.by_opcode, code),
+                           (self.by_pair, pair),
+                           (self.by_time, cycle // self.interval)):
+            row = table[key]
+            row[0] += 1
+            row[1] += nbytes
+        for f in self.reason_fields:
+            if f in layout:
+                val = PktLayouts.value(data, layout[f])
+                self.reasons[(code, f, val)] += 1
+
+    def print(self, ns: bool = False):
+        unit = 'nS' if ns else 'uS'
+        scale = 2.5 if ns else 2.5e-3  # cycles are 2.5nS
+        pair_fmt = lambda gc, s, d: (f'{GCID(s)!r}->{GCID(d)!r}' if gc
+                                     else f'{s:03x}->{d:03x}')
+        tables = (('Intf', self.by_intf, lambda k: f'{k:x}'),
+                  ('VC', self.by_vc, str),
+                  ('OpCode', self.by_opcode, self.opcode_name),
+                  ('SGCID->DGCID', self.by_pair, lambda k: pair_fmt(*k)),
+                  (f'Time({unit})', self.by_time,
+                   lambda k: f'{k * self.interval * scale:.3f}'))
+        for title, groups, fmt in tables:
+            print(f'Traffic by {title}:')
+            print(f'  {title:>28s} {"Packets":>10s} {"Bytes":>12s}')
+            for key in sorted(groups):
+                pkts, nbytes = groups[key]
+                print(f'  {fmt(key):>28s} {pkts:10d} {nbytes:12d}')
+        if self.reasons:
+            print('Response reasons:')
+            print(f'  {"OpCode":>28s} {"Field":>10s} {"Value":>5s} '
+                  f'{"Packets":>10s}')
+            for (code, f, val) in sorted(self.reasons):
+                print(f'  {self.opcode_name(code):>28s} {f:>10s} {val:5d} '
+                      f'{self.reasons[(code, f, val)]:10d}')
+        print(f'{self.pkts} packets: {self.bad_pcrc} bad PCRC, '
+              f'{self.bad_ecrc} bad ECRC')
+
+
+class ReorderWindow():
+    '''Min-heap of packets keyed on a sort key (usually a cycle count).
+    Once more than "size" packets are pending, the smallest is released,
+    so memory is bounded by the window size rather than the capture size.
+    A size of 0 means unbounded, i.e., a full sort.
+    '''
+    def __init__(self, key, size: int = 0):
+        self.key = key
+        self.size = size
+        self.heap = []
+        self.seq = 0  # tie-breaker, keeps the sort stable
+
+    def push(self, pkt):
+        heapq.heappush(self.heap, (self.key(pkt), self.seq, pkt))
+        self.seq += 1
+        if self.size and len(self.heap) > self.size:
+            yield heapq.heappop(self.heap)[2]
+
+    def drain(self):
+        while self.heap:
+            yield heapq.heappop(self.heap)[2]
+
+
+class PktFilter(ast.NodeTransformer):
+    '''Compile a --filter expression over explicit packet header fields,
+    e.g., "DCID==0x11 and OpCode in (Read,Write) and VC==1", into a
+    function of the raw header bits. Field offsets come from the spec
+    version's ExplicitReqHdr.hd_fields, so a rejected packet costs only
+    a few shifts and masks and is never decoded.
+
+    Besides the header fields (split fields like DCIDl/DCIDm/DCIDh are
+    combined), Intf, User and Cycle are available. OpClass names can be
+    used as values anywhere; OpCode names only when compared to OpCode.
+    '''
+    hdr_bytes = 12  # enough for every field in hd_fields
+
+    allowed = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp,
+               ast.Not, ast.Invert, ast.Compare, ast.Eq, ast.NotEq, ast.Lt,
+               ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.BinOp,
+               ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+               ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List,
+               ast.Set)
+
+    def __init__(self, genz, expr: str):
+        self.fields = self.hdr_fields(genz.ExplicitReqHdr.hd_fields)
+        self.fields['Intf'] = '(user & 0xfff)'
+        self.fields['User'] = 'user'
+        self.fields['Cycle'] = 'cycle'
+        self.ocls = genz.OpClasses._map
+        self.opcodes = defaultdict(set)
+        for ocl in self.ocls.values():
+            try:
+                opc = genz.Packet._ocl.opClass(ocl)
+            except KeyError:
+                continue
+            for name, opcode in opc._map.items():
+                self.opcodes[name].add(ocl << 5 | opcode)
+        self.expr = expr
+        try:
+            tree = ast.parse(expr, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f'invalid filter "{expr}": {e.msg}')
+        body = self.visit(tree.body)
+        func = ast.Expression(body=ast.Lambda(
+            args=ast.arguments(posonlyargs=[],
+                               args=[ast.arg(arg=a) for a in
+                                     ('H', 'user', 'cycle')],
+                               kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=body))
+        ast.fix_missing_locations(func)
+        self.func = eval(compile(func, '<filter>', 'eval'), {})
+
+    @staticmethod
+    def hdr_field_bits(hd_fields):
+        '''Map each field name to its (bit, width) parts, low part first;
+        split fields like DCIDl/DCIDm/DCIDh are also combined as DCID
+        '''
+        raw = {}
+        bit = 0
+        for name, _, width in hd_fields:
+            raw[name] = ((bit, width),)
+            bit += width
+        fields = dict(raw)
+        for name in raw:
+            base = name[:-1]
+            if name[-1] != 'l' or (base + 'h') not in raw:
+                continue
+            fields[base] = tuple(raw[part][0] for part in
+                                 (base + 'l', base + 'm', base + 'h')
+                                 if part in raw)
+        return fields
+
+    @staticmethod
+    def hdr_fields(hd_fields):
+        '''Map each field name to a python expression extracting it
+        from the little-endian header int "H"
+        '''
+        fields = {}
+        for name, parts in PktFilter.hdr_field_bits(hd_fields).items():
+            exprs = []
+            shift = 0
+            for bit, width in parts:
+                exprs.append(f'((H >> {bit}) & {(1 << width) - 1:#x})' +
+                             (f' << {shift}' if shift else ''))
+                shift += width
+            fields[name] = ('(' + ' | '.join(f'({e})' for e in exprs) + ')'
+                            if len(exprs) > 1 else exprs[0])
+        return fields
+
+    def visit(self, node):
+        if not isinstance(node, self.allowed):
+            raise ValueError('unsupported filter syntax: {}'.format(
+                type(node).__name__))
+        return super().visit(node)
+
+    def field(self, name):
+        return ast.parse(self.fields[name], mode='eval').body
+
+    def visit_Constant(self, node):
+        if type(node.value) is not int:
+            raise ValueError(f'filter constant {node.value!r} is not an int')
+        return node
+
+    def visit_Name(self, node):
+        if node.id in self.fields:
+            return self.field(node.id)
+        if node.id in self.ocls:
+            return ast.Constant(value=self.ocls[node.id])
+        raise ValueError(f'unknown filter name "{node.id}"')
+
+    def opcode_names(self, node):
+        if isinstance(node, ast.Name):
+            names = [node]
+        elif isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            names = node.elts
+        else:
+            return None
+        if not all(isinstance(n, ast.Name) and n.id not in self.fields
+                   for n in names):
+            return None
+        return [n.id for n in names]
+
+    def visit_Compare(self, node):
+        names = None
+        if (isinstance(node.left, ast.Name) and node.left.id == 'OpCode' and
+            len(node.ops) == 1):
+            names = self.opcode_names(node.comparators[0])
+        if names is None:
+            return self.generic_visit(node)
+        # compare (OCL, OpCode) pairs, since opcode values are per-OpClass
+        codes = set()
+        for name in names:
+            if name not in self.opcodes:
+                raise ValueError(f'unknown OpCode name "{name}"')
+            codes |= self.opcodes[name]
+        op = node.ops[0]
+        if isinstance(op, (ast.Eq, ast.In)):
+            op = ast.In()
+        elif isinstance(op, (ast.NotEq, ast.NotIn)):
+            op = ast.NotIn()
+        else:
+            raise ValueError('OpCode names only support ==, !=, in, not in')
+        left = ast.parse('{} << 5 | {}'.format(self.fields['OCL'],
+                                              self.fields['OpCode']),
+                         mode='eval').body
+        return ast.Compare(left=left, ops=[op],
+                           comparators=[ast.Constant(value=frozenset(codes))])
+
+    def __call__(self, hdr) -> bool:
+        cycle, user, data = hdr
+        H = int.from_bytes(data[0:self.hdr_bytes], 'little')
+        return self.func(H, user, cycle)
+
+
+def field_bits(cls, name):
+    '''Return (byte, shift, mask) of ctypes bit field "name" of "cls",
+    with shift < 32, so the field can be read from one dword
+    '''
+    desc = getattr(cls, name)
+    if hasattr(desc, 'bit_size'):  # Python 3.13+
+        bit, width = desc.bit_offset, desc.bit_size
+    else:
+        bit, width = desc.size & 0xffff, desc.size >> 16
+    return (desc.offset + bit // 32 * 4, bit % 32, (1 << width) - 1)
+
+
+class PktLayouts():
+    '''Locations of packet fields that are not in the common explicit
+    header. They depend on the packet format - the OpCode, plus the GC,
+    NH, LP and RK bits that add optional fields - so each format is
+    learned by decoding its first packet, and later packets are read
+    from their raw bits.
+
+    "cols" maps each wanted column to alternative tuples of ctypes
+    field names, low part first, e.g., {'Addr': (('Addrl', 'Addrh'),)}.
+    '''
+    def __init__(self, genz, cols):
+        fields = PktFilter.hdr_fields(genz.ExplicitReqHdr.hd_fields)
+        self.key = eval('lambda H: ({OCL} << 5 | {OpCode}) << 4 | {GC} | '
+                        '{NH} << 1 | {LP} << 2 | {RK} << 3'.format(**fields),
+                        {})
+        self.cols = cols
+        self.layouts = {}  # key -> {col: ((byte, shift, mask, pos), ...)}
+
+    def get(self, key):
+        return self.layouts.get(key)
+
+    def learn(self, key, pkt):
+        cls = type(pkt)
+        names = {f[0] for f in cls._fields_}
+        layout = {}
+        for col, alternatives in self.cols.items():
+            for parts in alternatives:
+                if all(p in names for p in parts):
+                    layout[col] = self.field_parts(cls, parts)
+                    break
+        self.layouts[key] = layout
+        return layout
+
+    @staticmethod
+    def field_parts(cls, parts):
+        bits = []
+        pos = 0
+        for name in parts:
+            byte, shift, mask = field_bits(cls, name)
+            bits.append((byte, shift, mask, pos))
+            pos += mask.bit_length()
+        return tuple(bits)
+
+    @staticmethod
+    def value(data, parts):
+        val = 0
+        for byte, shift, mask, pos in parts:
+            dw = int.from_bytes(data[byte:byte+4], 'little')
+            val |= ((dw >> shift) & mask) << pos
+        return val
+
+
+class PktColumns():
+    '''Decode batches of packets straight into NumPy structured arrays,
+    one column per field, for --export. Header fields are extracted
+    with vectorized shifts and masks over the whole batch; fields whose
+    location depends on the packet format come from PktLayouts. A
+    column a packet does not have is 0. Time and Delta are in seconds,
+    with Delta computed as for the text output (file order).
+    '''
+    hdr_cols = ('OCL', 'OpCode', 'LEN', 'VC', 'PCRC', 'SCID', 'DCID',
+                'Tag', 'AKey', 'Deadline', 'ECN', 'GC', 'NH', 'PM',
+                'LP', 'TA', 'RK')
+    layout_cols = {'SSID': (('SSID',),),
+                   'DSID': (('DSID',), ('GMCP',)),
+                   'RDSize': (('RDSize',),),
+                   'Addr': (('Addrl', 'Addrh'),),
+                   'RRSPReason': (('RRSPReason',),),
+                   'Reason': (('Reason',),)}
+
+    def __init__(self, genz):
+        hd_fields = genz.ExplicitReqHdr.hd_fields
+        self.hdr_bits = PktFilter.hdr_field_bits(hd_fields)
+        self.layouts = PktLayouts(genz, self.layout_cols)
+        self.checker = BatchCRC(genz)
+        hdr_dtype = [(name, self.uint(sum(w for _, w in self.hdr_bits[name])))
+                     for name in self.hdr_cols]
+        self.dtype = np.dtype(
+            [('Time', '<f8'), ('Delta', '<f8'), ('Cycle', '<u8'),
+             ('Intf', '<u2'), ('User', '<u4')] + hdr_dtype +
+            [('SGCID', '<u4'), ('DGCID', '<u4'), ('RDSize', '<u2'),
+             ('Addr', '<u8'), ('RRSPReason', 'u1'), ('Reason', 'u1'),
+             ('ECRC', '<u4'), ('PCRCChk', 'i1'), ('ECRCChk', 'i1')])
+        self.prev_time = None  # carried across batches for Delta
+        self.prev_req_time = None
+
+    @staticmethod
+    def uint(width):
+        return '<u{}'.format(1 if width <= 8 else 2 if width <= 16 else 4)
+
+    def batch(self, decode, data, offsets, lengths, cycles, users):
+        '''Return the structured array for one hdr_batches()/bin_batches()
+        batch; "decode" turns a hdr tuple into a packet
+        '''
+        buf = np.frombuffer(data, dtype=np.uint8)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        out = np.zeros(len(offsets), dtype=self.dtype)
+        dws = [BatchCRC.dwords(buf, offsets, i)
+               for i in range(PktFilter.hdr_bytes // 4)]
+        for name in self.hdr_cols:
+            val = np.zeros(len(offsets), dtype=np.uint32)
+            pos = 0
+            for bit, width in self.hdr_bits[name]:
+                part = (dws[bit // 32] >> np.uint32(bit % 32)) & np.uint32(
+                    (1 << width) - 1)
+                val |= part << np.uint32(pos)
+                pos += width
+            out[name] = val
+        out['Cycle'] = cycles
+        out['User'] = users
+        out['Intf'] = out['User'] & 0xfff
+        out['Time'] = out['Cycle'] * 2.5e-9
+        self.deltas(out)
+        out['SGCID'] = out['SCID']
+        out['DGCID'] = out['DCID']
+        self.layout_columns(out, decode, data, buf, offsets, lengths, dws)
+        pcrc_chk, ecrc_chk, _, _ = self.checker.check(data, offsets, lengths)
+        out['PCRCChk'] = pcrc_chk
+        out['ECRCChk'] = ecrc_chk
+        LEN = out['LEN'].astype(np.int64)
+        valid = (LEN > 0) & (LEN * 4 <= lengths)
+        out['ECRC'] = np.where(valid, BatchCRC.dwords(
+            buf, offsets, np.where(valid, LEN - 1, 0)) >> 8, 0)
+        return out
+
+    def deltas(self, out):
+        # requests: time since the previous request; responses (and
+        # requests with no previous request): time since previous packet
+        time = out['Time']
+        is_req = out['OpCode'] >= 4
+        idx = np.arange(len(time))
+        prev_time = np.empty_like(time)
+        prev_time[1:] = time[:-1]
+        prev_time[:1] = np.nan if self.prev_time is None else self.prev_time
+        last_req = np.maximum.accumulate(np.where(is_req, idx, -1))
+        prev_req = np.empty_like(last_req)
+        prev_req[1:] = last_req[:-1]
+        prev_req[:1] = -1
+        carried = np.nan if self.prev_req_time is None else self.prev_req_time
+        prev_req_time = np.where(prev_req >= 0, time[np.maximum(prev_req, 0)],
+                                 carried)
+        delta = np.where(is_req & ~np.isnan(prev_req_time),
+                         time - prev_req_time, time - prev_time)
+        out['Delta'] = np.nan_to_num(delta, nan=0.0)  # first packet
+        if len(time):
+            self.prev_time = time[-1]
+            if last_req[-1] >= 0:
+                self.prev_req_time = time[last_req[-1]]
+
+    def layout_columns(self, out, decode, data, buf, offsets, lengths, dws):
+        keys = ((out['OCL'].astype(np.int64) << 5 | out['OpCode']) << 4 |
+                out['GC'] | out['NH'].astype(np.int64) << 1 |
+                out['LP'].astype(np.int64) << 2 |
+                out['RK'].astype(np.int64) << 3)
+        view = memoryview(data)
+        uniq, first = np.unique(keys, return_index=True)
+        for key, i in zip(uniq.tolist(), first.tolist()):
+            layout = self.layouts.get(key)
+            if layout is None:
+                off = int(offsets[i])
+                hdr = (int(out['Cycle'][i]), int(out['User'][i]),
+                       view[off:off+int(lengths[i])])
+                layout = self.layouts.learn(key, decode(hdr))
+            if not layout:
+                continue
+            sel = np.flatnonzero(keys == key)
+            offs = offsets[sel]
+            vals = {}
+            for col, parts in layout.items():
+                val = np.zeros(len(sel), dtype=np.uint64)
+                for byte, shift, mask, pos in parts:
+                    dw = BatchCRC.dwords(buf, offs + byte)
+                    val |= (((dw >> np.uint32(shift)) & np.uint32(mask))
+                            .astype(np.uint64) << np.uint64(pos))
+                vals[col] = val
+            for col in ('RDSize', 'Addr', 'RRSPReason', 'Reason'):
+                if col in vals:
+                    out[col][sel] = vals[col]
+            if 'SSID' in vals and 'DSID' in vals:  # GC is part of the key
+                out['SGCID'][sel] = (vals['SSID'] << np.uint64(12) |
+                                     out['SCID'][sel])
+                out['DGCID'][sel] = (vals['DSID'] << np.uint64(12) |
+                                     out['DCID'][sel])
+
+
+def pkt_hdr(matches):
+    '''Convert the OHB regex matches for one packet into a compact
+    (cycle, user, data) tuple
+    '''
     cycle = int(matches[0].group('time'), base=0)
-    time = cycle * 2.5e-9
     user = int(matches[0].group('user'), base=0)
     data = bytearray()
     no_user = False
@@ -93,72 +702,464 @@ def parse_pkt_data(genz, args, matches, sorter):
             no_user = True
         for dw in reversed(dws):
             data.extend(dw.to_bytes(4, 'little'))
+    return (cycle, 0xff if no_user else user, data)
+
+def make_pkt(genz, args, hdr, sorter):
+    cycle, user, data = hdr
     pkt = genz.Packet.dataToPkt(data, verbosity=args.verbosity, csv=args.csv)
     pkt.cycle = cycle
-    pkt.time = time
-    pkt.user = 0xff if no_user else user
-    sorter.append(pkt)
+    pkt.time = cycle * 2.5e-9
+    pkt.user = user
+    if sorter is not None:
+        sorter.append(pkt)
     return pkt
 
 def packet_reqrsp_sort(pkt):
     return pkt.sorter.req_rsp_sort(pkt)
 
-def process_text(genz, args, fname):
-    with open(fname) as f:
-        pkts = []
-        pkt_sorter = PacketSorter()
-        pkt_matches = []
-        in_pkt = False
-        line_num = 0
-        for line in f:
-            line_num += 1
-            m_zmmu = re_zmmu_match.match(line)
-            if m_zmmu is not None:
-                break
-            if in_pkt:
-                m_last = re_ohb_last_match.match(line)
-                if m_last is not None:
+def packet_time_sort(pkt):
+    return pkt.cycle
+
+def ohb_pkt_matches(lines, fname):
+    '''Generator yielding the list of OHB regex matches for each packet
+    '''
+    pkt_matches = []
+    in_pkt = False
+    line_num = 0
+    for line in lines:
+        line_num += 1
+        m_zmmu = re_zmmu_match.match(line)
+        if m_zmmu is not None:
+            break
+        if in_pkt:
+            m_last = re_ohb_last_match.match(line)
+            if m_last is not None:
+                in_pkt = False
+                pkt_matches.append(m_last)
+                yield pkt_matches
+                pkt_matches = []
+            else:
+                m_other = re_ohb_other_match.match(line)
+                if m_other is not None:
+                    pkt_matches.append(m_other)
+                else:
+                    print('Warning: invalid pkt data at line {} of {}: "{}"'.format(
+                        line_num, fname, line.rstrip()))
                     in_pkt = False
-                    pkt_matches.append(m_last)
-                    pkt = parse_pkt_data(genz, args, pkt_matches, pkt_sorter)
-                    pkts.append(pkt)
                     pkt_matches = []
-                else:
-                    m_other = re_ohb_other_match.match(line)
-                    if m_other is not None:
-                        pkt_matches.append(m_other)
-                    else:
-                        print('Warning: invalid pkt data at line {} of {}: "{}"'.format(
-                            line_num, fname, line.rstrip()))
-                        in_pkt = False
-                        pkt_matches = []
-            else:
-                m_first = re_ohb_first_match.match(line)
-                if m_first is not None:
-                    pkt_matches.append(m_first)
-                    in_pkt = True if m_first.group('last') is None else False
-                    if not in_pkt:
-                        pkt = parse_pkt_data(genz, args, pkt_matches, pkt_sorter)
-                        pkts.append(pkt)
-                        pkt_matches = []
-            # end if in_pkt
-        # end for line
-
-        if args.time_sort:
-            pkts.sort(key=lambda p: p.time)
-        elif args.reqrsp_sort:
-            pkts.sort(key=packet_reqrsp_sort)
-        first = True
-        prev_req = None
-        for pkt in pkts:
-            is_req = pkt.isRequest
-            delta = 0 if first else (
-                (pkt.time - prev_req.time) if is_req and prev_req is not None
-                else (pkt.time - prev_pkt.time))
-            first = False
-            yield (pkt, delta)
-            prev_pkt = pkt
-            prev_req = pkt if is_req else prev_req
+        else:
+            m_first = re_ohb_first_match.match(line)
+            if m_first is not None:
+                pkt_matches.append(m_first)
+                in_pkt = True if m_first.group('last') is None else False
+                if not in_pkt:
+                    yield pkt_matches
+                    pkt_matches = []
+        # end if in_pkt
+    # end for line
+
+class ChunkLines():
+    '''Iterate over the text lines of the byte range [start, end) of a
+    capture file opened in binary mode
+    '''
+    def __init__(self, f, start, end):
+        self.f = f
+        self.end = end
+        self.zmmu = False  # hit the ZMMU dump, which ends the packet data
+        f.seek(start)
+
+    def __iter__(self):
+        while self.f.tell() < self.end:
+            line = self.f.readline()
+            if not line:
+                break
+            line = line.decode(errors='replace')
+            if re_zmmu_match.match(line) is not None:
+                self.zmmu = True
+                break
+            yield line
+
+def find_chunks(fname, jobs, min_chunk=1<<20):
+    '''Split a capture file into (start, end) byte ranges, each starting
+    on a packet "first" line. Several chunks per job keep the workers
+    busy without holding many decoded chunks in the parent at once.
+    '''
+    size = os.path.getsize(fname)
+    chunk_sz = max(size // (jobs * 4), min_chunk)
+    starts = [0]
+    with open(fname, 'rb') as f:
+        pos = chunk_sz
+        while pos < size:
+            f.seek(pos)
+            f.readline()  # skip (possibly partial) line
+            while True:
+                off = f.tell()
+                line = f.readline()
+                if not line:
+                    off = size
+                    break
+                if re_ohb_first_match.match(
+                        line.decode(errors='replace')) is not None:
+                    break
+            if off >= size:
+                break
+            starts.append(off)
+            pos = off + chunk_sz
+    ends = starts[1:] + [size]
+    return list(zip(starts, ends))
+
+def decode_chunk(fname, start, end):
+    '''Process pool worker: return the header tuples of all packets
+    in one chunk, and whether the chunk ended at the ZMMU dump
+    '''
+    with open(fname, 'rb') as f:
+        lines = ChunkLines(f, start, end)
+        hdrs = [pkt_hdr(m) for m in
+                ohb_pkt_matches(lines, f'{fname}@{start:#x}')]
+    return (hdrs, lines.zmmu)
+
+def parallel_hdrs(args, fname):
+    '''Generator yielding the header tuples decoded by a pool of
+    worker processes, in file order
+    '''
+    chunks = iter(find_chunks(fname, args.jobs))
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        pending = deque(pool.submit(decode_chunk, fname, start, end)
+                        for start, end in islice(chunks, 2 * args.jobs))
+        while pending:
+            hdrs, zmmu = pending.popleft().result()
+            yield from hdrs
+            if zmmu:
+                for fut in pending:
+                    fut.cancel()
+                break
+            nxt = next(chunks, None)
+            if nxt is not None:
+                pending.append(pool.submit(decode_chunk, fname, *nxt))
+
+def sort_pkts(args, pkts):
+    '''Reorder a packet stream through a bounded ReorderWindow
+    '''
+    if args.time_sort:
+        key = packet_time_sort
+    elif args.reqrsp_sort:
+        key = packet_reqrsp_sort
+    else:
+        yield from pkts
+        return
+    window = ReorderWindow(key, size=args.window)
+    for pkt in pkts:
+        yield from window.push(pkt)
+    yield from window.drain()
+
+def pkt_deltas(pkts):
+    '''Generator yielding (pkt, delta) tuples in stream order
+    '''
+    first = True
+    prev_req = None
+    for pkt in pkts:
+        is_req = pkt.isRequest
+        delta = 0 if first else (
+            (pkt.time - prev_req.time) if is_req and prev_req is not None
+            else (pkt.time - prev_pkt.time))
+        first = False
+        yield (pkt, delta)
+        prev_pkt = pkt
+        prev_req = pkt if is_req else prev_req
+
+def follow_lines(f, fname, idle):
+    '''Generator yielding complete lines of text file "f" as they are
+    appended, like tail -f. "idle" is called each time the end of the
+    file is reached, before sleeping FOLLOW_POLL seconds. If the file
+    is truncated, reading restarts from the beginning.
+    '''
+    partial = ''
+    while True:
+        line = f.readline()
+        if line.endswith('\n'):
+            yield partial + line
+            partial = ''
+            continue
+        partial += line  # no newline yet: still being written
+        idle()
+        time.sleep(FOLLOW_POLL)
+        if os.stat(fname).st_size < f.tell():
+            f.seek(0)
+            partial = ''
+
+def text_hdrs(args, fname, idle=None):
+    '''Generator yielding the header tuple of each packet in a text
+    capture, in file order. With --follow, "idle" is called whenever
+    there is no new input (default: flush stdout), and Ctrl-C ends the
+    input, so later stages still drain any packets they hold.
+    '''
+    if args.follow:
+        with open(fname) as f:
+            lines = follow_lines(f, fname, idle or sys.stdout.flush)
+            try:
+                for matches in ohb_pkt_matches(lines, fname):
+                    yield pkt_hdr(matches)
+            except KeyboardInterrupt:
+                pass
+        return
+    if args.jobs > 1:
+        yield from parallel_hdrs(args, fname)
+        return
+    with open(fname) as f:
+        for matches in ohb_pkt_matches(f, fname):
+            yield pkt_hdr(matches)
+
+class BinTraceHeader(ctypes.LittleEndianStructure):
+    _fields_ = [('Magic',    ctypes.c_char * 8),
+                ('Version',  ctypes.c_uint32),
+                ('RecSize',  ctypes.c_uint32),
+                ('Count',    ctypes.c_uint64),  # number of packets
+                ('IndexOff', ctypes.c_uint64)]  # file offset of records
+
+class BinTraceRecord(ctypes.LittleEndianStructure):
+    _fields_ = [('Cycle',    ctypes.c_uint64),
+                ('User',     ctypes.c_uint32),
+                ('Len',      ctypes.c_uint32),  # packet data bytes
+                ('Offset',   ctypes.c_uint64)]  # offset within data blob
+
+BIN_MAGIC = b'GZPKTBIN'
+BIN_VERSION = 1
+
+CRC_BATCH = 1 << 16  # packets per --crc-only batch
+
+def save_bin(hdrs, fname):
+    '''Write header tuples to an indexed binary trace file: a
+    BinTraceHeader, the raw packet data blob, then one BinTraceRecord
+    per packet. Returns the number of packets written.
+    '''
+    with open(fname, 'wb') as f, tempfile.TemporaryFile() as idx:
+        hdr = BinTraceHeader(Magic=BIN_MAGIC, Version=BIN_VERSION,
+                             RecSize=ctypes.sizeof(BinTraceRecord))
+        f.write(hdr)
+        off = 0
+        count = 0
+        for cycle, user, data in hdrs:
+            idx.write(BinTraceRecord(Cycle=cycle, User=user,
+                                     Len=len(data), Offset=off))
+            f.write(data)
+            off += len(data)
+            count += 1
+        hdr.Count = count
+        hdr.IndexOff = ctypes.sizeof(hdr) + off
+        idx.seek(0)
+        shutil.copyfileobj(idx, f)
+        f.seek(0)
+        f.write(hdr)
+    return count
+
+def open_bin(fname):
+    '''Map a binary trace file copy-on-write; returns (blob, recs),
+    the packet data blob as a memoryview and the BinTraceRecord array
+    '''
+    with open(fname, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < ctypes.sizeof(BinTraceHeader):  # mmap fails if empty
+            raise ValueError(f'{fname}: not a genz_pkt binary trace')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    hdr = BinTraceHeader.from_buffer(mm)
+    if (hdr.Magic != BIN_MAGIC or hdr.Version != BIN_VERSION or
+        hdr.RecSize != ctypes.sizeof(BinTraceRecord) or
+        hdr.IndexOff < ctypes.sizeof(hdr) or
+        hdr.IndexOff + hdr.Count * hdr.RecSize > size):
+        raise ValueError(f'{fname}: not a genz_pkt binary trace')
+    recs = (BinTraceRecord * hdr.Count).from_buffer(mm, hdr.IndexOff)
+    blob = memoryview(mm)[ctypes.sizeof(hdr):hdr.IndexOff]
+    return (blob, recs)
+
+def bin_hdrs(fname):
+    '''Generator yielding the header tuple of each packet in a binary
+    trace file. The packet data are memoryview slices of the mapping,
+    not copies.
+    '''
+    blob, recs = open_bin(fname)
+    for rec in recs:
+        yield (rec.Cycle, rec.User, blob[rec.Offset:rec.Offset+rec.Len])
+
+def hdr_batches(hdrs, size):
+    '''Group header tuples into (data, offsets, lengths, cycles, users)
+    batches, with the packet data of each batch in one buffer
+    '''
+    hdrs = iter(hdrs)
+    for batch in iter(lambda: list(islice(hdrs, size)), []):
+        cycles, users, datas = zip(*batch)
+        lengths = [len(d) for d in datas]
+        offsets = list(accumulate(lengths, initial=0))[:-1]
+        yield (bytearray().join(datas), offsets, lengths, cycles, users)
+
+def bin_batches(fname, size):
+    '''Like hdr_batches(), but sliced straight out of a binary trace
+    file without copying any packet data
+    '''
+    blob, recs = open_bin(fname)
+    if len(recs) == 0:
+        return
+    cols = np.ctypeslib.as_array(recs)
+    for i in range(0, len(cols), size):
+        c = cols[i:i+size]
+        yield (blob, c['Offset'], c['Len'], c['Cycle'], c['User'])
+
+def crc_failures(genz, args, batches, counts):
+    '''Generator yielding only the packets that fail their PCRC or ECRC
+    check; only those are fully decoded. Totals are added to "counts".
+    '''
+    checker = BatchCRC(genz)
+    for data, offsets, lengths, cycles, users in batches:
+        pcrc_chk, ecrc_chk, _, _ = checker.check(data, offsets, lengths)
+        counts['pkts'] += len(pcrc_chk)
+        counts['pcrc'] += int(np.count_nonzero(pcrc_chk))
+        counts['ecrc'] += int(np.count_nonzero(ecrc_chk))
+        view = memoryview(data)
+        for i in np.flatnonzero((pcrc_chk != 0) | (ecrc_chk != 0)):
+            off = int(offsets[i])
+            hdr = (int(cycles[i]), int(users[i]),
+                   view[off:off+int(lengths[i])])
+            yield make_pkt(genz, args, hdr, None)
+
+def export_npy(arrays, fname, dtype):
+    '''Write a stream of structured arrays to a NumPy .npy file.
+    The count is not known until the end, so the records are buffered
+    in a temporary file (like save_bin()) and copied after the header.
+    '''
+    count = 0
+    with tempfile.TemporaryFile() as tmp:
+        for arr in arrays:
+            tmp.write(arr.tobytes())
+            count += len(arr)
+        tmp.seek(0)
+        with open(fname, 'wb') as f:
+            np.lib.format.write_array_header_1_0(f, {
+                'descr': np.lib.format.dtype_to_descr(dtype),
+                'fortran_order': False, 'shape': (count,)})
+            shutil.copyfileobj(tmp, f)
+    return count
+
+def export_parquet(arrays, fname, dtype):
+    '''Write a stream of structured arrays to a Parquet file, one row
+    group per array (requires pyarrow)
+    '''
+    table = lambda arr: pa.table({name: arr[name] for name in dtype.names})
+    count = 0
+    with pq.ParquetWriter(fname, table(np.zeros(0, dtype)).schema) as writer:
+        for arr in arrays:
+            writer.write_table(table(arr))
+            count += len(arr)
+    return count
+
+def export_columns(genz, args, fname, binary, out):
+    '''Decode the input packets into PktColumns arrays and write them
+    to "out", as Parquet if it ends in .parquet, otherwise .npy
+    '''
+    cols = PktColumns(genz)
+    decode = lambda hdr: make_pkt(genz, args, hdr, None)
+    arrays = (cols.batch(decode, *batch)
+              for batch in crc_batches(args, fname, binary))
+    if out.endswith('.parquet'):
+        return export_parquet(arrays, out, cols.dtype)
+    return export_npy(arrays, out, cols.dtype)
+
+def crc_batches(args, fname, binary):
+    '''CRC_BATCH sized batches of the input packets, zero-copy when
+    reading an unfiltered binary trace
+    '''
+    if binary and args.filter is None:
+        return bin_batches(fname, CRC_BATCH)
+    return hdr_batches(input_hdrs(args, fname, binary), CRC_BATCH)
+
+def input_hdrs(args, fname=None, binary=False, idle=None):
+    '''Header tuples from the --text or --load-bin input, with any
+    --filter applied before the packets are decoded
+    '''
+    hdrs = bin_hdrs(fname) if binary else text_hdrs(args, fname, idle)
+    if args.filter is None:
+        return hdrs
+    return filter(args.filter, hdrs)
+
+def process_hdrs(genz, args, hdrs):
+    # only req/rsp sort needs to remember requests
+    pkt_sorter = (PacketSorter(limit=args.window) if args.reqrsp_sort
+                  else None)
+    pkts = (make_pkt(genz, args, hdr, pkt_sorter) for hdr in hdrs)
+    yield from pkt_deltas(sort_pkts(args, pkts))
+
+def latency_stats(genz, args, hdrs):
+    '''Match every response to its request and gather LatencyStats'''
+    pkt_sorter = PacketSorter(limit=args.window)
+    stats = LatencyStats()
+    for hdr in hdrs:
+        pkt = make_pkt(genz, args, hdr, pkt_sorter)
+        if pkt.isRequest:
+            continue
+        req = pkt_sorter.find_request_packet(pkt)
+        if req is None:
+            stats.unmatched += 1
+            continue
+        stats.add(req, pkt)
+        pkt_sorter.remove(req)  # each request has just one response
+    return stats
+
+def traffic_stats(genz, args, fname, binary):
+    '''Gather TrafficStats for the input packets, with the CRCs checked
+    in batches when NumPy is available
+    '''
+    scale = 2.5 if args.ns else 2.5e-3  # cycles are 2.5nS
+    stats = TrafficStats(genz, max(round(args.interval / scale), 1))
+    decode = lambda hdr: make_pkt(genz, args, hdr, None)
+    if np is None:
+        for hdr in input_hdrs(args, fname, binary):
+            stats.add(hdr, decode)
+        return stats
+    checker = BatchCRC(genz)
+    for data, offsets, lengths, cycles, users in crc_batches(args, fname,
+                                                             binary):
+        pcrc_chk, ecrc_chk, _, _ = checker.check(data, offsets, lengths)
+        view = memoryview(data)
+        cols = (np.asarray(c).tolist() for c in
+                (offsets, lengths, cycles, users, pcrc_chk, ecrc_chk))
+        for off, ln, cycle, user, pchk, echk in zip(*cols):
+            stats.add((cycle, user, view[off:off+ln]), decode, pchk, echk)
+    return stats
+
+def follow_stats(genz, args, fname):
+    '''--stats --follow: gather TrafficStats packet by packet (batches
+    would wait for input) and, if --period is set, print and reset them
+    every --period seconds. The rest are printed at the end of the
+    capture or on Ctrl-C.
+    '''
+    scale = 2.5 if args.ns else 2.5e-3  # cycles are 2.5nS
+    interval = max(round(args.interval / scale), 1)
+    decode = lambda hdr: make_pkt(genz, args, hdr, None)
+    stats = TrafficStats(genz, interval)
+    due = time.monotonic() + args.period
+
+    def report(force=False):
+        nonlocal stats, due
+        now = time.monotonic()
+        if not force and (args.period == 0 or now < due):
+            sys.stdout.flush()
+            return
+        if stats.pkts or force:
+            print(time.strftime('--- %H:%M:%S ---'))
+            stats.print(ns=args.ns)
+            sys.stdout.flush()
+        stats = TrafficStats(genz, interval)
+        due = now + args.period
+
+    try:
+        for hdr in input_hdrs(args, fname, idle=report):
+            stats.add(hdr, decode)
+            if args.period and stats.pkts & 0x3ff == 0:
+                report()
+    except KeyboardInterrupt:
+        pass
+    report(force=True)
+
+def process_text(genz, args, fname):
+    yield from process_hdrs(genz, args, input_hdrs(args, fname))
 
 def process_tuser_tdata(genz, args, tuser: str, tdata: str):
     if tuser is not None:
@@ -195,6 +1196,46 @@ def main():
                         help='sort output packets by time')
     parser.add_argument('-T', '--text', action='store',
                         help='input file containing ohb packet text')
+    parser.add_argument('--save-bin', action='store',
+                        help='write --text packets to an indexed binary trace '
+                        'file instead of printing them')
+    parser.add_argument('--load-bin', action='store',
+                        help='input file containing binary trace written '
+                        'by --save-bin')
+    parser.add_argument('--crc-only', action='store_true',
+                        help='only print packets with bad PCRC/ECRC, '
+                        'in file order (requires NumPy)')
+    parser.add_argument('--latency', action='store_true',
+                        help='print request->response latency report '
+                        'instead of packets')
+    parser.add_argument('--stats', action='store_true',
+                        help='print aggregate traffic tables instead of '
+                        'packets')
+    parser.add_argument('--interval', action='store', type=float,
+                        default=100,
+                        help='--stats time interval, in uS (or nS with --ns) '
+                        '(default: 100)')
+    parser.add_argument('--export', action='store',
+                        help='write decoded packet header columns to a '
+                        'NumPy .npy structured array, or to Parquet if the '
+                        'name ends in .parquet (requires NumPy/pyarrow)')
+    parser.add_argument('-f', '--filter', action='store',
+                        help='only process packets matching a header field '
+                        'expression, e.g., "DCID==0x11 and OpCode in '
+                        '(Read,Write) and VC==1"')
+    parser.add_argument('-F', '--follow', action='store_true',
+                        help='keep decoding --text input as it is appended, '
+                        'like tail -f, until the ZMMU dump')
+    parser.add_argument('--period', action='store', type=float, default=0,
+                        help='with --follow --stats, print (and reset) the '
+                        'stats every PERIOD seconds')
+    parser.add_argument('-j', '--jobs', action='store', type=int, default=1,
+                        help='number of processes decoding --text input')
+    parser.add_argument('-w', '--window', action='store', type=int,
+                        default=REORDER_WINDOW,
+                        help='reorder window (in packets) for sorted output; '
+                        'bounds memory use, 0 for an unbounded full sort '
+                        f'(default: {REORDER_WINDOW})')
     parser.add_argument('--tdata', action='store',
                         help='single packet tdata field')
     parser.add_argument('--tuser', action='store',
@@ -202,24 +1243,86 @@ def main():
     parser.add_argument('--ns', action='store_true',
                         help='output times in ns')
     args = parser.parse_args()
+    if args.crc_only and np is None:
+        parser.error('--crc-only requires NumPy')
+    if args.follow and not args.text:
+        parser.error('--follow requires --text')
+    if args.follow and args.jobs > 1:
+        parser.error('--follow cannot be used with --jobs')
+    if args.follow and args.crc_only:  # would wait for a full batch
+        parser.error('--follow cannot be used with --crc-only')
+    # these only write their output at the end of the input
+    for opt in ('save_bin', 'export', 'latency'):
+        if args.follow and getattr(args, opt):
+            parser.error('--follow cannot be used with --{}'.format(
+                opt.replace('_', '-')))
+    if args.follow and args.window == 0 and (args.time_sort or
+                                             args.reqrsp_sort):
+        parser.error('--follow cannot be used with a full sort (--window 0)')
+    if args.export and np is None:
+        parser.error('--export requires NumPy')
+    if args.export and args.export.endswith('.parquet') and pa is None:
+        parser.error('--export to Parquet requires pyarrow')
     if args.verbosity > 5:
         print('Gen-Z version = {}'.format(args.genz_version))
     genz = import_module('genz.genz_{}'.format(args.genz_version.replace('.', '_')))
     unit = 'nS' if args.ns else 'uS'
-    if args.text:
+    if args.filter is not None:
+        try:
+            args.filter = PktFilter(genz, args.filter)
+        except ValueError as e:
+            parser.error(str(e))
+    fname = args.load_bin or args.text
+    binary = args.load_bin is not None
+    if binary:
+        try:
+            open_bin(fname)  # check it up front, not mid-output
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if args.text and args.save_bin:
+        count = save_bin(input_hdrs(args, args.text), args.save_bin)
+        if args.verbosity:
+            print(f'wrote {count} packets to {args.save_bin}')
+    elif args.latency and fname:
+        hdrs = input_hdrs(args, fname, binary)
+        latency_stats(genz, args, hdrs).print(ns=args.ns)
+    elif args.stats and args.follow:
+        follow_stats(genz, args, fname)
+    elif args.stats and fname:
+        traffic_stats(genz, args, fname, binary).print(ns=args.ns)
+    elif args.export and fname:
+        count = export_columns(genz, args, fname, binary, args.export)
+        if args.verbosity:
+            print(f'exported {count} packets to {args.export}')
+    elif fname:
+        crc_counts = Counter()
+        if args.crc_only:
+            batches = crc_batches(args, fname, binary)
+            pkts = pkt_deltas(crc_failures(genz, args, batches, crc_counts))
+        else:
+            pkts = process_hdrs(genz, args, input_hdrs(args, fname, binary))
         if args.csv:
             print('Time,Delta,Intf,OpcName,OCL,OpCode,LEN,SCID,DCID,Tag,VC,PCRC,AKey,Deadline,ECN,GC,NH,PM,LP,TA,RK,DR,DRIface,RDSize,PadCNT,Addr,MGRUUID,TC,NS,UN,PU,RC,MS,PD,FPS,RRSPReason,RNR_QD,RS,Reason,ECRC')
-        for pkt, delta in process_text(genz, args, args.text):
-            intf = pkt.user & 0xfff
-            pkt_time = pkt.time*1e9 if args.ns else pkt.time*1e6
-            pkt_delta = delta*1e9 if args.ns else delta*1e6
-            if args.csv:
-                print(f'{pkt_time:.6f},{pkt_delta:.6f},{intf:x},{pkt}')
-            elif args.time_delta:
-                print(f'Time: {pkt_time:16.6f}{unit}, Delta: {pkt_delta:14.6f}{unit}, Intf: {intf:x}, {pkt}')
-            else:
-                print(f'Time: {pkt_time:16.6f}{unit}, Intf: {intf:x}, {pkt}')
-        # end for
+        try:
+            for pkt, delta in pkts:
+                intf = pkt.user & 0xfff
+                pkt_time = pkt.time*1e9 if args.ns else pkt.time*1e6
+                pkt_delta = delta*1e9 if args.ns else delta*1e6
+                if args.csv:
+                    print(f'{pkt_time:.6f},{pkt_delta:.6f},{intf:x},{pkt}')
+                elif args.time_delta:
+                    print(f'Time: {pkt_time:16.6f}{unit}, Delta: {pkt_delta:14.6f}{unit}, Intf: {intf:x}, {pkt}')
+                else:
+                    print(f'Time: {pkt_time:16.6f}{unit}, Intf: {intf:x}, {pkt}')
+            # end for
+        except KeyboardInterrupt:
+            if not args.follow:
+                raise
+        if args.crc_only:
+            print('{pkts} packets checked: {pcrc} bad PCRC, {ecrc} bad ECRC'.format(
+                **crc_counts))
+        if args.verbosity > 5:
+            print(genz.pktTypeCache)
     elif args.tuser and args.tdata:
         pkt = process_tuser_tdata(genz, args, args.tuser, args.tdata)
         intf = pkt.user & 0xfff
@@ -231,7 +1334,7 @@ def main():
             print(f'Time: {pkt_time:16.6f}{unit}, Delta: {pkt_delta:14.6f}{unit}, Intf: {intf:x}, {pkt}')
         else:
             print(f'Time: {pkt_time:16.6f}{unit}, Intf: {intf:x}, {pkt}')
-    # end if args.text
+    # end if args.text and args.save_bin
 
 if __name__ == '__main__':
     try:
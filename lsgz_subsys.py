@@ -23,12 +23,17 @@
 
 import contextlib
 import argparse
+import io
+import json
 import os
 import ctypes
 import re
 from uuid import UUID
 from pathlib import Path
 from importlib import import_module
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from functools import partial
 from genz.genz_common import GCID, CState
 from pdb import set_trace, post_mortem
 import traceback
@@ -110,22 +115,28 @@ def timing(f):
         return result
     return wrapper
 
-#@timing
-def get_struct(fpath, map, parent=None, core=None, verbosity=0):
-    fname = fpath.name.replace(fpath.suffix, '')
+def read_data(fpath):
     with fpath.open(mode='rb') as f:
         try:  # Revisit: workaround for zero-length files
-            data = bytearray(f.read())
+            return bytearray(f.read())
         except OSError:
             size = fpath.stat().st_size
             if size == 0:
                 return None
             else:
                 raise
-        struct = map.fileToStruct(fname, data, path=fpath,
-                                  parent=parent, core=core,
-                                  verbosity=verbosity)
-        return struct
+
+#@timing
+def get_struct(fpath, map, parent=None, core=None, verbosity=0, data=None):
+    fname = fpath.name.replace(fpath.suffix, '')
+    if data is None:
+        data = read_data(fpath)
+        if data is None:
+            return None
+    struct = map.fileToStruct(fname, data, path=fpath,
+                              parent=parent, core=core,
+                              verbosity=verbosity)
+    return struct
 
 def get_parent(fpath, dpath, parents):
     parent = parents['core@0x0']  # default parent, if we do not find another
@@ -149,6 +160,154 @@ def get_cstate(ctl, map):
         cstate = CState(7)
     return cstate
 
+def pool_map(pool, fn, *iterables):
+    '''map() using the --jobs thread pool, if any; results stay in order'''
+    if pool is None:
+        return map(fn, *iterables)
+    return pool.map(fn, *iterables)
+
+class Parents(dict):
+    '''The "parents" dict for Comp.ls_json() and Comp.ls_diff().
+    Structures that were skipped are remembered (by directory name,
+    with their data, if already read) and only decoded if a wanted
+    structure needs them as its parent.
+    '''
+    def __init__(self, map, core, verbosity=0):
+        super().__init__()
+        self.map = map
+        self.core = core
+        self.verbosity = verbosity
+        self.skipped = {}
+
+    def __missing__(self, name):
+        fpath, dpath, data = self.skipped.pop(name)
+        parent = get_parent(fpath, dpath, self)
+        struct = get_struct(fpath, self.map, core=self.core, parent=parent,
+                            verbosity=self.verbosity, data=data)
+        self[name] = struct
+        return struct
+
+class SnapHeader(ctypes.LittleEndianStructure):
+    _fields_ = [('Magic',    ctypes.c_char * 8),
+                ('Version',  ctypes.c_uint32),
+                ('RecSize',  ctypes.c_uint32),
+                ('Count',    ctypes.c_uint64)]  # number of records
+
+class SnapRecord(ctypes.LittleEndianStructure):
+    _fields_ = [('KeyLen',   ctypes.c_uint16),  # component key bytes
+                ('PathLen',  ctypes.c_uint16),  # structure path bytes
+                ('DataLen',  ctypes.c_uint32)]  # raw structure bytes
+
+SNAP_MAGIC = b'GZLSSNAP'
+SNAP_VERSION = 1
+
+class SnapWriter():
+    '''Write a --snapshot file: a SnapHeader, then one SnapRecord per
+    control structure, each followed by its component key, its path
+    (relative to the component control dir), and its raw bytes. Every
+    component also gets a record with an empty path, so components
+    without control structures are still in the snapshot.
+    The file is written as "fname".tmp and only renamed to "fname" by
+    close(), so an interrupted --snapshot leaves no valid-looking file.
+    '''
+    def __init__(self, fname):
+        self.fname = fname
+        self.tmp = fname + '.tmp'
+        self.f = open(self.tmp, 'wb')
+        self.hdr = SnapHeader(Magic=SNAP_MAGIC, Version=SNAP_VERSION,
+                              RecSize=ctypes.sizeof(SnapRecord))
+        self.f.write(self.hdr)
+        self.lock = Lock()  # for --jobs
+
+    def add(self, key, path, data):
+        key = key.encode()
+        path = path.encode()
+        rec = SnapRecord(KeyLen=len(key), PathLen=len(path),
+                         DataLen=len(data))
+        with self.lock:
+            self.f.write(rec)
+            self.f.write(key)
+            self.f.write(path)
+            self.f.write(data)
+            self.hdr.Count += 1
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(self.hdr)
+        self.f.close()
+        os.replace(self.tmp, self.fname)
+        return self.hdr.Count
+
+def load_snapshot(fname):
+    '''Returns a dict of component key -> {structure path: raw bytes}
+    from a --snapshot file
+    '''
+    with open(fname, 'rb') as f:
+        buf = memoryview(f.read())
+    if len(buf) < ctypes.sizeof(SnapHeader):
+        raise ValueError(f'{fname}: not an lsgenz snapshot')
+    hdr = SnapHeader.from_buffer_copy(buf)
+    if (hdr.Magic != SNAP_MAGIC or hdr.Version != SNAP_VERSION or
+        hdr.RecSize != ctypes.sizeof(SnapRecord)):
+        raise ValueError(f'{fname}: not an lsgenz snapshot')
+    snap = {}
+    off = ctypes.sizeof(hdr)
+    for _ in range(hdr.Count):
+        if off + ctypes.sizeof(SnapRecord) > len(buf):
+            break  # truncated - reported below
+        rec = SnapRecord.from_buffer_copy(buf, off)
+        off += ctypes.sizeof(rec)
+        key = bytes(buf[off:off+rec.KeyLen]).decode()
+        off += rec.KeyLen
+        path = bytes(buf[off:off+rec.PathLen]).decode()
+        off += rec.PathLen
+        structs = snap.setdefault(key, {})
+        if rec.PathLen > 0:
+            structs[path] = buf[off:off+rec.DataLen]
+        off += rec.DataLen
+    if off != len(buf):
+        raise ValueError(f'{fname}: truncated lsgenz snapshot')
+    return snap
+
+def flat_items(jd, prefix=''):
+    '''Flatten nested to_json() dicts/lists into (name, value) pairs'''
+    if isinstance(jd, dict):
+        for k, v in jd.items():
+            yield from flat_items(v, '{}.{}'.format(prefix, k) if prefix else k)
+    elif isinstance(jd, list):
+        for i, v in enumerate(jd):
+            yield from flat_items(v, '{}[{}]'.format(prefix, i))
+    else:
+        yield (prefix, jd)
+
+def json_diffs(old, new, prefix=''):
+    old = dict(flat_items(old, prefix))
+    for name, val in flat_items(new, prefix):
+        if old.get(name) != val:
+            yield (name, old.get(name), val)
+
+def struct_diffs(old, new, fields=None):
+    '''Generator yielding (field, old value, new value) for each field
+    that differs between structures "old" and "new". Only the table
+    elements whose bytes differ are decoded.
+    '''
+    if isinstance(new, genz.ControlTable2DArray):
+        for i, (orow, nrow) in enumerate(zip(old.array, new.array)):
+            for j, (o, n) in enumerate(zip(orow, nrow)):
+                if bytes(o) != bytes(n):
+                    yield from json_diffs(o.to_json(fields), n.to_json(fields),
+                                          '[{}][{}]'.format(i, j))
+    elif isinstance(new, genz.ControlTableArray):
+        for i, (o, n) in enumerate(zip(old.array, new.array)):
+            if bytes(o) != bytes(n):
+                yield from json_diffs(o.to_json(fields), n.to_json(fields),
+                                      '[{}]'.format(i))
+    else:
+        yield from json_diffs(old.to_json(fields), new.to_json(fields))
+
+def diff_val(val):
+    return '{:#x}'.format(val) if isinstance(val, int) else str(val)
+
 def cuuid_serial(cuuid, serial):
     return str(cuuid) + ':' + '{:#018x}'.format(serial) if serial is not None else '???'
 
@@ -167,6 +326,13 @@ class Res:
         return '{:19s} {}:{} {}'.format(self.name, self.class_uuid,
                                         self.instance_uuid, self.driver)
 
+    def to_json(self):
+        return { 'name': self.name,
+                 'class_uuid': str(self.class_uuid),
+                 'instance_uuid': str(self.instance_uuid),
+                 'driver': self.driver,
+                }
+
 class Comp:
     def __init__(self, fabnum, path, map=None, name=None, dr=False, verbosity=0):
         self.fabnum = fabnum
@@ -176,6 +342,7 @@ class Comp:
         self.cclass = get_cclass(path)
         self.serial = get_serial(path)
         self.cuuid_sn = cuuid_serial(self.cuuid, self.serial)
+        self.key = self.snap_key()  # for --snapshot/--diff
         self.name = name if name is not None else self.cclass_name
         self.verbosity = verbosity
         self.map = map
@@ -190,6 +357,16 @@ class Comp:
     def get_cstate(self):
         self.cstate = get_cstate(self.ctl, self.map)
 
+    def snap_key(self):
+        '''Unique key, for merging and --snapshot/--diff. Without a serial
+        number, cuuid_sn is '???' for every component, so use the fabric
+        and GCID (or the sysfs name, if there is no GCID) instead.
+        '''
+        if self.serial is not None:
+            return self.cuuid_sn
+        where = self.gcid if self.gcid != INVALID_GCID else self.path.name
+        return '{}@{}:{}'.format(self.cuuid, self.fabnum, where)
+
     @property
     def cclass_name(self):
         try:
@@ -218,41 +395,28 @@ class Comp:
             self.res.append(res)
         # end for res
 
-    def ls_resources(self):
+    def ls_resources(self, file=None):
         if self.verbosity > 0:
             try:
                 for res in sorted(self.res):
-                    print('  {}'.format(res))
+                    print('  {}'.format(res), file=file)
             except BrokenPipeError:
                 return
         # end if
 
-    def ls_comp(self, ignore_dr=True):
-        parents = {}
-        drs = []
-        # defer cstate read until component is "selected"
-        self.get_cstate()
-        # one-line component summary first
-        print(self)
-        if self.verbosity < 1:
-            return drs
-        # then resources (if any)
-        self.ls_resources()
-        if self.ctl is None:
-            return drs
-        # of all structures, do core structure first
+    def read_core(self, switch=True):
+        '''Read the core structure. Unless "switch" is False, also read
+        the switch, component destination table and route control
+        structures, saving them in the core for later.
+        '''
         core_path = self.ctl / 'core@0x0' / 'core'
         try:
             core = get_struct(core_path, self.map, verbosity=self.verbosity)
         except FileNotFoundError:
-            return drs
-        try:
-            if self.verbosity > 1:
-                print('  {}='.format('core@0x0'), end='')
-                print(core)
-        except BrokenPipeError:
-            return drs
-        parents['core@0x0'] = core
+            return None
+        if not switch:
+            core.sw = core.comp_dest = core.route_control = None
+            return core
         # get (but don't print) the switch structure - save in core for later
         try:
             sw_dir = list(self.ctl.glob('component_switch@*'))[0]
@@ -294,47 +458,259 @@ class Comp:
                 core.sw.HCS = 0
             if core.comp_dest is not None:
                 core.comp_dest.HCS = 0
+        return core
+
+    def ls_comp(self, ignore_dr=True, file=None):
+        parents = {}
+        drs = []
+        # defer cstate read until component is "selected"
+        self.get_cstate()
+        # one-line component summary first
+        print(self, file=file)
+        if self.verbosity < 1:
+            return drs
+        # then resources (if any)
+        self.ls_resources(file=file)
+        if self.ctl is None:
+            return drs
+        # of all structures, do core structure first
+        core = self.read_core()
+        if core is None:
+            return drs
+        try:
+            if self.verbosity > 1:
+                print('  {}='.format('core@0x0'), end='', file=file)
+                print(core, file=file)
+        except BrokenPipeError:
+            return drs
+        parents['core@0x0'] = core
+        for dpath, fname in self.control_files(ignore_dr, drs):
+            struct = None
+            if fname == 'core':  # we already did core
+                continue
+            elif fname == 'component_switch':
+                struct = core.sw
+            elif fname == 'component_destination_table':
+                struct = core.comp_dest
+            if self.verbosity < 2 and fname != 'interface': # ignore non-interfaces
+                continue;
+            try:
+                equals = self.verbosity > 1
+                print('  {}{}'.format(dpath.name, '=' if equals else ' '),
+                      end='', file=file)
+                fpath = dpath / fname
+                parent = get_parent(fpath, dpath, parents)
+                if struct is None:
+                    struct = get_struct(fpath, self.map, core=core, parent=parent,
+                                        verbosity=self.verbosity)
+                print(struct, file=file)
+            except BrokenPipeError:
+                return drs
+            parents[dpath.name] = struct
+        # end for fname
+        return drs
+
+    def ls_json(self, wanted=None, ignore_dr=True, file=None):
+        '''Print this component as a single line of JSON. If "wanted"
+        (a dict of structure name -> set of field names, or None for
+        all fields) is given, only those structures are read and
+        included; otherwise, the structures ls_comp() would print at
+        this verbosity are included.
+        '''
+        drs = []
+        self.get_cstate()
+        jd = self.to_json()
+        if self.verbosity > 0:
+            jd['resources'] = [res.to_json() for res in sorted(self.res)]
+        if self.ctl is not None and (wanted is not None or self.verbosity > 0):
+            jd['structs'] = self.json_structs(wanted, ignore_dr, drs)
+        try:
+            print(json.dumps(jd), file=file)
+        except BrokenPipeError:
+            pass
+        return drs
+
+    def json_structs(self, wanted, ignore_dr, drs):
+        structs = {}
+        # the switch-related structures are only needed by non-core ones
+        core = self.read_core(switch=(wanted is None or
+                                      wanted.keys() - {'core'}))
+        if core is None:
+            return structs
+        if wanted is None and self.verbosity > 1:
+            structs['core@0x0'] = core.to_json()
+        elif wanted is not None and 'core' in wanted:
+            structs['core@0x0'] = core.to_json(wanted['core'])
+        parents = Parents(self.map, core, verbosity=self.verbosity)
+        parents['core@0x0'] = core
+        for dpath, fname in self.control_files(ignore_dr, drs):
+            if fname == 'core':  # we already did core
+                continue
+            fpath = dpath / fname
+            if wanted is None:
+                selected = self.verbosity > 1 or fname == 'interface'
+            else:
+                selected = fname in wanted
+            if not selected:
+                parents.skipped[dpath.name] = (fpath, dpath, None)
+                continue
+            if fname == 'component_switch':
+                struct = core.sw
+            elif fname == 'component_destination_table':
+                struct = core.comp_dest
+            else:
+                struct = get_struct(fpath, self.map, core=core,
+                                    parent=get_parent(fpath, dpath, parents),
+                                    verbosity=self.verbosity)
+            parents[dpath.name] = struct
+            if struct is None:  # zero-length file
+                continue
+            # like ls_comp(), only include table contents at -vvvv
+            if (wanted is None and self.verbosity < 4 and
+                isinstance(struct, genz.ControlTable)):
+                continue
+            fields = wanted.get(fname) if wanted is not None else None
+            structs[dpath.name] = struct.to_json(fields)
+        # end for fname
+        return structs
+
+    def ls_snapshot(self, writer, wanted=None, ignore_dr=True, file=None):
+        '''Add the raw bytes of this component's control structures
+        (only those in "wanted", if given) to SnapWriter "writer"'''
+        drs = []
+        writer.add(self.key, '', b'')
+        if self.ctl is None:
+            return drs
+        for dpath, fname in self.control_files(ignore_dr, drs):
+            if wanted is not None and fname not in wanted:
+                continue
+            fpath = dpath / fname
+            data = read_data(fpath)
+            if data is not None:
+                writer.add(self.key, str(fpath.relative_to(self.ctl)), data)
+        # end for fname
+        return drs
+
+    def ls_diff(self, snap, visited, wanted=None, ignore_dr=True, file=None):
+        '''Print the fields of this component's control structures that
+        changed since snapshot "snap", adding its key to set "visited".
+        Structures whose raw bytes are unchanged are not decoded.
+        '''
+        drs = []
+        visited.add(self.key)
+        self.get_cstate()
+        try:
+            if self.key not in snap:
+                print('+ {}'.format(self), file=file)
+                return drs
+            lines = []
+            if self.ctl is not None:
+                lines = self.diff_structs(snap[self.key], wanted, ignore_dr, drs)
+            if len(lines) > 0:
+                print(self, file=file)
+                print('\n'.join(lines), file=file)
+        except BrokenPipeError:
+            pass
+        return drs
+
+    def diff_structs(self, old_structs, wanted, ignore_dr, drs):
+        lines = []
+        seen = set()
+        core = self.read_core(switch=(wanted is None or
+                                      wanted.keys() - {'core'}))
+        if core is None:
+            return lines
+        known = {'core': core, 'component_switch': core.sw,
+                 'component_destination_table': core.comp_dest}
+        parents = Parents(self.map, core, verbosity=self.verbosity)
+        parents['core@0x0'] = core  # component_* dirs are walked before it
+        for dpath, fname in self.control_files(ignore_dr, drs):
+            fpath = dpath / fname
+            struct = known.get(fname)
+            if struct is not None:
+                parents[dpath.name] = struct
+            if wanted is not None and fname not in wanted:
+                if struct is None:
+                    parents.skipped[dpath.name] = (fpath, dpath, None)
+                continue
+            path = str(fpath.relative_to(self.ctl))
+            seen.add(path)
+            data = struct.data if struct is not None else read_data(fpath)
+            old = old_structs.get(path)
+            if old is None:
+                lines.append('  + {}'.format(path))
+            if old is None or data is None or data == old:
+                if struct is None:
+                    parents.skipped[dpath.name] = (fpath, dpath, data)
+                continue
+            parent = get_parent(fpath, dpath, parents)
+            if struct is None:
+                struct = get_struct(fpath, self.map, core=core, parent=parent,
+                                    verbosity=self.verbosity, data=data)
+                parents[dpath.name] = struct
+            old_struct = get_struct(fpath, self.map, core=core, parent=parent,
+                                    verbosity=self.verbosity,
+                                    data=bytearray(old))
+            fields = wanted.get(fname) if wanted is not None else None
+            for name, o, n in struct_diffs(old_struct, struct, fields):
+                lines.append('  {} {}: {} -> {}'.format(
+                    dpath.name, name, diff_val(o), diff_val(n)))
+        # end for fname
+        for path in sorted(old_structs.keys() - seen):
+            if wanted is None or Path(path).name in wanted:
+                lines.append('  - {}'.format(path))
+        return lines
+
+    def control_files(self, ignore_dr, drs):
+        '''Generator yielding (dpath, fname) of each control structure
+        file, parents before children. DR directories are not
+        descended into (unless "ignore_dr" is False); a Comp for each
+        is appended to "drs" instead.
+        '''
         for dir, dirnames, filenames in os.walk(self.ctl):
             dirnames.sort()
             #print('dir={}, dirnames={}, filenames={}'.format(dir, dirnames, filenames))
             if dir[-3:] == '/dr':
-                drs.append(Comp(self.fabnum, Path(dir), map=self.map, dr=True,
-                                verbosity=self.verbosity))
+                dr = Comp(self.fabnum, Path(dir), map=self.map, dr=True,
+                          verbosity=self.verbosity)
+                dr.key = '{}/{}'.format(self.key, dr.path.relative_to(self.ctl))
+                drs.append(dr)
                 continue
             elif ignore_dr and dir.find('/dr/') >= 0:
                 continue
             dpath = Path(dir)
-            for file in sorted(filenames):
-                struct = None
-                if file == 'core':  # we already did core
-                    continue
-                elif file == 'component_switch':
-                    struct = core.sw
-                elif file == 'component_destination_table':
-                    struct = core.comp_dest
-                if self.verbosity < 2 and file != 'interface': # ignore non-interfaces
-                    continue;
-                try:
-                    equals = self.verbosity > 1
-                    print('  {}{}'.format(dpath.name, '=' if equals else ' '), end='')
-                    fpath = dpath / file
-                    parent = get_parent(fpath, dpath, parents)
-                    if struct is None:
-                        struct = get_struct(fpath, self.map, core=core, parent=parent,
-                                            verbosity=self.verbosity)
-                    print(struct)
-                except BrokenPipeError:
-                    return drs
-                parents[dpath.name] = struct
-            # end for filenames
+            for fname in sorted(filenames):
+                yield (dpath, fname)
         # end for dir
-        return drs
+
+    def ls_all(self, ls=None):
+        '''Return the ls_comp() (or "ls") output of this component and
+        its DRs as a string, for --jobs'''
+        ls = Comp.ls_comp if ls is None else ls
+        out = io.StringIO()
+        drs = ls(self, file=out)
+        for dr in drs:
+            _ = ls(dr, ignore_dr=False, file=out)
+        return out.getvalue()
 
     def __lt__(self, other): # sort based on GCID
         if type(self) != type(other):
             return NotImplemented
         return self.gcid < other.gcid
 
+    def to_json(self):
+        jd = { 'fabric': self.fabnum,
+               'gcid': str(self.gcid),
+               'name': self.name,
+               'cclass': self.cclass,
+               'cuuid': str(self.cuuid),
+               'serial': self.serial,
+               'cstate': str(self.cstate),
+              }
+        if self.dr:
+            jd['dr'] = str(self.path)
+        return jd
+
     def __str__(self):
         if self.dr:
             return 'dr: {}'.format(self.path) # Revisit: better format
@@ -371,6 +747,18 @@ def main():
                         help='enter debugger on uncaught exception')
     parser.add_argument('-S', '--struct', action='store',
                         help='input file representing a single control structure')
+    parser.add_argument('-j', '--jobs', action='store', default=1, type=int,
+                        help='read components using this many threads')
+    parser.add_argument('-J', '--json', action='store_true',
+                        help='output one line of JSON per component')
+    parser.add_argument('--fields', action='store', default=None, nargs='+',
+                        help='with --json, output only these structures or '
+                        'structure fields (e.g., interface.IStatus core)')
+    parser.add_argument('--snapshot', action='store', default=None,
+                        help='save the raw control structures to this file')
+    parser.add_argument('--diff', action='store', default=None,
+                        help='print only the fields that changed since '
+                        'this --snapshot file')
     args = parser.parse_args()
     if args.verbosity > 5:
         print('Gen-Z version = {}'.format(args.genz_version))
@@ -381,7 +769,10 @@ def main():
     if args.struct:
         fpath = Path(args.struct)
         struct = get_struct(fpath, map, verbosity=args.verbosity)
-        print(struct)
+        if args.json:
+            print(json.dumps(struct.to_json()))
+        else:
+            print(struct)
         return
     try:
         match_fabrics = [] if args.fabric is None else [int(f, base=10) for f in args.fabric]
@@ -403,6 +794,18 @@ def main():
     except ValueError:
         print('invalid class uuid: {}'.format(args.cuuid))
         exit(1)
+    wanted = None  # dict of struct name -> set of fields, or None for all
+    if args.fields is not None:
+        if not (args.json or args.snapshot or args.diff):
+            print('--fields requires --json, --snapshot or --diff')
+            exit(1)
+        wanted = {}
+        for f in args.fields:
+            name, _, field = f.partition('.')
+            if field == '':
+                wanted[name] = None
+            elif wanted.get(name, set()) is not None:
+                wanted.setdefault(name, set()).add(field)
     match_cclasses = []
     for c in (args.cclass if args.cclass is not None else []):
         try:
@@ -419,66 +822,121 @@ def main():
         sys_devices = Path('/sys/devices')
     dev_fabrics = sys_devices.glob('genz*')      # locally-visible Gen-Z devices
     genz_fabrics = Path('/sys/bus/genz/fabrics') # fabric components (FM-only)
+    # sysfs reads are I/O-bound (often in-band control ops), so threads
+    # help; each Comp is read by one thread and printed in GCID order
+    pool = ThreadPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+    writer = None
+    snap = None
+    visited = set()  # --diff component keys
+    present = set()  # keys of all components found, selected or not
+    if bool(args.json) + bool(args.snapshot) + bool(args.diff) > 1:
+        print('only one of --json, --snapshot or --diff is allowed')
+        exit(1)
+    if args.snapshot:
+        writer = SnapWriter(args.snapshot)
+        ls = partial(Comp.ls_snapshot, writer=writer, wanted=wanted)
+    elif args.diff:
+        try:
+            snap = load_snapshot(args.diff)
+        except (OSError, ValueError) as e:
+            print(e)
+            exit(1)
+        ls = partial(Comp.ls_diff, snap=snap, visited=visited, wanted=wanted)
+    elif args.json:
+        # JSON is streamed, one line per component, as each is read
+        ls = partial(Comp.ls_json, wanted=wanted)
+    else:
+        ls = Comp.ls_comp
     all_comps = {}
     for fab in dev_fabrics:
         comps = {}
         fabnum = component_num(fab)
         bridges = fab.glob('bridge*') # local bridges
-        for br_path in bridges:
-            brnum = component_num(br_path)
-            br = Comp(fabnum, br_path, map=map, name='bridge{}'.format(brnum),
-                      verbosity=args.verbosity)
+        new_br = lambda br_path: Comp(fabnum, br_path, map=map,
+                                      name='bridge{}'.format(component_num(br_path)),
+                                      verbosity=args.verbosity)
+        for br in pool_map(pool, new_br, bridges):
             if args.keyboard:
                 set_trace()
+            present.add(br.key)
             selected = br.check_selected(args, match_cuuids, match_serials,
                                          match_fabrics, match_gcids,
                                          match_cclasses)
             if selected:
-                comps[br.cuuid_sn] = br # save br for later printing
+                comps[br.key] = br # save br for later printing
         # end for br_path
         fab_comps = genz_fabrics.glob('fabric{}/*:*/*:*:*'.format(fabnum)) # FM-visible components
-        for comp_path in fab_comps:
-            comp = Comp(fabnum, comp_path, map=map, verbosity=args.verbosity)
+        new_comp = lambda comp_path: Comp(fabnum, comp_path, map=map,
+                                          verbosity=args.verbosity)
+        for comp in pool_map(pool, new_comp, fab_comps):
             if args.keyboard:
                 set_trace()
+            present.add(comp.key)
             selected = comp.check_selected(args, match_cuuids, match_serials,
                                            match_fabrics, match_gcids,
                                            match_cclasses)
             if selected:
-                if not comp.cuuid_sn in comps.keys():
-                    comps[comp.cuuid_sn] = comp # save comp for later printing
+                if not comp.key in comps.keys():
+                    comps[comp.key] = comp # save comp for later printing
             if args.verbosity < 1:
                 continue
         # end for comp
         os_comps = fab.glob('*:*/*:*:*') # other OS-visible Gen-Z devices
-        for comp_path in os_comps:
-            comp = Comp(fabnum, comp_path, verbosity=args.verbosity)
+        new_comp = lambda comp_path: Comp(fabnum, comp_path,
+                                          verbosity=args.verbosity)
+        for comp in pool_map(pool, new_comp, os_comps):
+            comp_path = comp.path
             if args.keyboard:
                 set_trace()
+            present.add(comp.key)
             selected = comp.check_selected(args, match_cuuids, match_serials,
                                            match_fabrics, match_gcids,
                                            match_cclasses)
             if not selected:
                 continue
-            if comp.cuuid_sn in comps.keys():
+            if comp.key in comps.keys():
                 # merge resources into existing Comp
-                existing = comps[comp.cuuid_sn]
+                existing = comps[comp.key]
                 existing.add_resources(comp_path.glob('genz{}:*'.format(comp_path.name)))
             else:
                 comp.add_resources(comp_path.glob('genz{}:*'.format(comp_path.name)))
-                comps[comp.cuuid_sn] = comp # save comp for later printing
+                comps[comp.key] = comp # save comp for later printing
         # end for comp_path
         if args.keyboard:
             set_trace()
         # now we actually print things
-        for comp in sorted(comps.values()):
-            if comp.cuuid_sn not in all_comps.keys():
-                drs = comp.ls_comp()
+        todo = [comp for comp in sorted(comps.values())
+                if comp.key not in all_comps.keys()]
+        if pool is None:
+            for comp in todo:
+                drs = ls(comp)
                 for dr in drs:
-                    _ = dr.ls_comp(ignore_dr=False)
-        # end for comp
+                    _ = ls(dr, ignore_dr=False)
+            # end for comp
+        else:
+            try:
+                for out in pool.map(partial(Comp.ls_all, ls=ls), todo):
+                    print(out, end='')
+            except BrokenPipeError:
+                pool.shutdown(cancel_futures=True)
+                return
+        # end if
         all_comps |= comps
     # end for fab
+    if writer is not None:
+        count = writer.close()
+        if args.verbosity:
+            print(f'wrote {count} records to {args.snapshot}')
+    if snap is not None:
+        # components in the snapshot that are gone - a DR component is
+        # only visited through its parent (the part of its key before
+        # the first '/'), so skip those of parents that are not selected
+        for key in sorted(snap.keys() - visited):
+            parent = key.split('/')[0]
+            if parent in visited or parent not in present:
+                print('- {}'.format(key))
+    if args.verbosity > 5 and not args.json:
+        print(genz.controlTypeCache)
     if args.keyboard:
         set_trace()
     return
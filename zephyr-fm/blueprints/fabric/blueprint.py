@@ -185,6 +185,43 @@ def partitions():
     return flask.make_response(flask.jsonify(fab.partitions.to_json()), 200)
 
 
+@Journal.BP.route(f'/{Journal.name}/metrics', methods=['GET'])
+def metrics():
+    """
+        Accepts GET request and returns a json body with the time and
+    control read/write counts of each exploration phase of this fabric,
+    in total and per component. A phase is named by its path of nested phases,
+    e.g., 'fab_init/comp_init/iface_init'.
+    Returned body model:
+    {
+        'phases': {
+          'phase/path': {
+            'calls': 'int',
+            'time': 'float', # seconds
+            'reads': 'int',
+            'read_bytes': 'int',
+            'writes': 'int',
+            'write_bytes': 'int'
+          },
+          ...
+        },
+        'components': {
+          'cuuid:serial': {
+            'phase/path': { ... }, # same as 'phases'
+            ...
+          },
+          ...
+        }
+    }
+
+    """
+    global Journal
+    mainapp = Journal.mainapp
+    fab = mainapp.conf.fab
+
+    return flask.make_response(flask.jsonify(fab.metrics.to_json()), 200)
+
+
 @Journal.BP.route(f'/{Journal.name}/uep', methods=['POST'])
 def uep():
     """
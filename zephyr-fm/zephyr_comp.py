@@ -23,6 +23,7 @@
 
 import ctypes
 from genz.genz_common import GCID, CState, IState, AKey, RKey, PHYOpStatus, ErrSeverity, CReset, HostMgrUUID, genzUUID, RefCount, MAX_HC, AllOnesData, DEFAULT_AKEY
+import mmap
 import os
 import re
 import time
@@ -34,6 +35,7 @@ from typing import List
 import zephyr_conf
 from zephyr_conf import log, INVALID_GCID
 from zephyr_iface import Interface
+from zephyr_metrics import timed
 from blueprints.resource.blueprint import send_resource
 
 # Revisit: these should move to zephyr_rkey.py
@@ -98,6 +100,7 @@ class Component():
     timer_unit_list = [ 1e-9, 10*1e-9, 100*1e-9, 1e-6, 10*1e-6, 100*1e-6,
                         1e-3, 10*1e-3, 100*1e-3, 1.0 ]
     ctl_timer_unit_list = [ 1e-6, 10*1e-6, 100*1e-6, 1e-3 ]
+    core_cache_ttl = 0.01 # seconds a core_fields() read stays valid
 
     def __new__(cls, cclass, *args, **kwargs):
         subclass_map = {cclass: subclass for subclass in cls.__subclasses__()
@@ -137,6 +140,7 @@ class Component():
         self.component_pa = None
         self.pt = None
         self.ssdt = None
+        self._core_cache = None # for core_fields()
         self.ssap = None
         self.pa = None
         self.ssdt_dir = None # needed by rt.invert() early on
@@ -187,6 +191,17 @@ class Component():
             js['name'] = name
         return js
 
+    @property
+    def dr(self):
+        return self._dr
+
+    @dr.setter
+    def dr(self, dr):
+        changed = (dr is None) != (getattr(self, '_dr', dr) is None)
+        self._dr = dr
+        if changed:  # DR interfaces are always usable for routing
+            self.fab.hops.update_comp(self)
+
     def set_dr(self, dr):
         self.dr = dr
         self.path = dr.path
@@ -210,24 +225,89 @@ class Component():
         if val == ones:
             raise AllOnesData(f'{self}: all-ones data')
 
+    def control_data(self, f):
+        '''Return the buffer to build a control structure on from open
+        control file "f". Normally, that's a copy of the whole file, but
+        with --mmap the file is mapped copy-on-write instead, so control
+        space is only read as the structure's fields are touched. Stores
+        to the structure land in a private copy of the page, never in
+        control space: just as for the copy, only control_write() (or
+        control_flush(), for deferred writes) pwrite()s them to the device,
+        and control_read() preads fresh data. Files that cannot be mapped
+        (e.g., most sysfs attributes) fall back to the copy.
+        '''
+        if zephyr_conf.args.mmap:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except (OSError, ValueError):
+                pass
+        fd = f.fileno()  # shared: don't use (or move) the file position
+        data = bytearray(os.pread(fd, os.fstat(fd).st_size, 0))
+        self.fab.metrics.read(len(data))
+        return data
+
     # Revisit: the sz & off params are workarounds for ctypes bugs
     def control_read(self, struct, field, sz=None, off=0, check=False):
         off += field.offset
         if sz is None:
             sz = ctypes.sizeof(field)  # Revisit: this doesn't work
+        # also with --mmap: a page already stored to is a private copy
         struct.data[off:off+sz] = os.pread(struct.fd, sz, off)
+        self.fab.metrics.read(sz)
         if check: # check that we didn't read bad all-ones data
             self.check_all_ones(sz, off, struct.data)
 
     # Revisit: the sz & off params are workarounds for ctypes bugs
-    def control_write(self, struct, field, sz=None, off=0, check=False):
+    def control_write(self, struct, field, sz=None, off=0, check=False,
+                      defer=False):
         off += field.offset
         if sz is None:
             sz = ctypes.sizeof(field)  # Revisit: this doesn't work
         if check: # check that we're not writing bad all-ones data
             self.check_all_ones(sz, off, struct.data)
-        os.pwrite(struct.fd, struct.data[off:off+sz], off)
+        if isinstance(struct, zephyr_conf.genz.CoreStructure):
+            self.core_cache_invalidate()
+        if defer: # until control_flush() - nothing reaches the device before
+            try:
+                struct._dirty.append((off, sz))
+            except AttributeError:
+                struct._dirty = [(off, sz)]
+        else:
+            self.control_pwrite(struct, off, sz)
 
+    def control_pwrite(self, struct, off, sz):
+        os.pwrite(struct.fd, struct.data[off:off+sz], off)
+        self.fab.metrics.write(sz)
+
+    def control_flush(self, struct):
+        '''Write the ranges of "struct" deferred by control_write().
+        Overlapping or adjacent ranges are coalesced, then written in
+        chunks of at most --max-xfer bytes (but never splitting a table
+        element). Runs are written in the order they were first deferred,
+        so a flush is also a write ordering barrier. That holds with
+        --mmap too, as stores to a mapped structure stay in its private
+        copy until written here (see control_data()).
+        '''
+        dirty = getattr(struct, '_dirty', None)
+        if not dirty:
+            return
+        struct._dirty = []
+        runs = []  # [start, end, seq]
+        for off, sz, seq in sorted((off, sz, seq) for seq, (off, sz)
+                                   in enumerate(dirty)):
+            if len(runs) > 0 and off <= runs[-1][1]:
+                runs[-1][1] = max(runs[-1][1], off + sz)
+                runs[-1][2] = min(runs[-1][2], seq)
+            else:
+                runs.append([off, off + sz, seq])
+        elem_sz = (ctypes.sizeof(struct.element)
+                   if hasattr(struct, 'element') else 1)
+        max_xfer = max(elem_sz, zephyr_conf.args.max_xfer // elem_sz * elem_sz)
+        for start, end, _ in sorted(runs, key=lambda run: run[2]):
+            for off in range(start, end, max_xfer):
+                self.control_pwrite(struct, off, min(max_xfer, end - off))
+
+    @timed()
     def add_fab_comp(self, setup=False):
         log.debug('add_fab_comp for {}'.format(self))
         cmd_name = self.nl.cfg.get('ADD_FAB_COMP')
@@ -239,7 +319,8 @@ class Component():
                 'mgr_uuid': self.mgr_uuid,
         }
         msg = self.nl.build_msg(cmd=cmd_name, data=data)
-        ret = self.nl.sendmsg(msg)
+        with self.fab.lock:  # one netlink socket, shared by crawl workers
+            ret = self.nl.sendmsg(msg)
         self.fab.update_path('/sys/devices/genz1')  # Revisit: MultiBridge hardcoded path
         if setup:
             self.setup_paths('control')
@@ -260,11 +341,13 @@ class Component():
                 'mgr_uuid': self.mgr_uuid,
         }
         msg = self.nl.build_msg(cmd=cmd_name, data=data)
-        ret = self.nl.sendmsg(msg)
+        with self.fab.lock:
+            ret = self.nl.sendmsg(msg)
         if rm_paths:
             self.remove_paths()
         return ret
 
+    @timed()
     def add_fab_dr_comp(self):
         log.debug('add_fab_dr_comp for {}'.format(self))
         cmd_name = self.nl.cfg.get('ADD_FAB_DR_COMP')
@@ -276,7 +359,8 @@ class Component():
                 'mgr_uuid': self.mgr_uuid,
         }
         msg = self.nl.build_msg(cmd=cmd_name, data=data)
-        ret = self.nl.sendmsg(msg)
+        with self.fab.lock:
+            ret = self.nl.sendmsg(msg)
         return ret
 
     def remove_fab_dr_comp(self):
@@ -292,23 +376,49 @@ class Component():
                 'mgr_uuid': self.mgr_uuid,
         }
         msg = self.nl.build_msg(cmd=cmd_name, data=data)
-        ret = self.nl.sendmsg(msg)
+        with self.fab.lock:
+            ret = self.nl.sendmsg(msg)
         self.remove_paths()
         return ret
 
+    def core_fields(self, *names, prefix='control'):
+        '''Return a CoreStructure in which fields "names" are current,
+        reading only the bytes holding them (with one pread). Each range
+        read is cached for core_cache_ttl seconds, so hot polling paths
+        share one small read; core_cache_invalidate() forces a re-read.
+        Only "names" are valid in the returned structure.
+        '''
+        genz = zephyr_conf.genz
+        if self._core_cache is None:
+            data = bytearray(ctypes.sizeof(genz.CoreStructure))
+            core = self.map.fileToStruct('core', data,
+                                         verbosity=self.verbosity)
+            self._core_cache = (core, {})
+        core, read_at = self._core_cache
+        rng = core.field_range(*names)
+        now = time.monotonic()
+        if now - read_at.get(rng, -self.core_cache_ttl) < self.core_cache_ttl:
+            return core
+        core_file = self.path / prefix / 'core@0x0/core'
+        with zephyr_conf.files.open(core_file) as f:
+            core.set_fd(f)
+            off, sz = core.read_fields(*names)
+        # end with
+        self.fab.metrics.read(sz)
+        self.check_all_ones(sz, off, core.data)
+        read_at[rng] = now
+        return core
+
+    def core_cache_invalidate(self):
+        if self._core_cache is not None:
+            self._core_cache[1].clear()
+
     # Returns the current component GCID
     def get_gcid(self, prefix='control'):
         gcid = None
-        core_file = self.path / prefix / 'core@0x0/core'
-        with core_file.open(mode='rb+') as f:
-            # Revisit: optimize this to avoid reading entire Core struct
-            data = bytearray(f.read())
-            core = self.map.fileToStruct('core', data, fd=f.fileno(),
-                                         verbosity=self.verbosity)
-            if core.all_ones_type_vers_size():
-                raise AllOnesData(f'{self}: core structure all-ones data')
-            if core.CV:
-                gcid = GCID(val=core.CID0)  # Revisit: Subnets
+        core = self.core_fields('CV', 'CID0', prefix=prefix)
+        if core.CV:
+            gcid = GCID(val=core.CID0)  # Revisit: Subnets
         return gcid
 
     def find_rsp_page_grid_path(self, prefix):
@@ -317,7 +427,7 @@ class Component():
                 'component_page_grid*@*'):
             pg_file = pg_dir / 'component_page_grid'
             with pg_file.open(mode='rb+') as f:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 pg = self.map.fileToStruct('component_page_grid', data,
                                            fd=f.fileno(),
                                            verbosity=self.verbosity)
@@ -413,6 +523,8 @@ class Component():
         self.paths_setup = True
 
     def remove_paths(self):
+        zephyr_conf.files.invalidate(self.path)
+        self.core_cache_invalidate()
         self.comp_dest_dir = None
         self.opcode_set_dir = None
         self.opcode_set_table_dir = None
@@ -447,7 +559,10 @@ class Component():
         return False
 
     # Returns True if component is usable - is C-Up/C-LP/C-DLP, not C-Down
-    def comp_init(self, pfm, prefix='control', ingress_iface=None, route=None):
+    # @claim (from a Crawl) is called before the first control write
+    @timed()
+    def comp_init(self, pfm, prefix='control', ingress_iface=None, route=None,
+                  claim=None):
         zargs = zephyr_conf.args
         genz = zephyr_conf.genz
         log.debug(f'comp_init for {self}')
@@ -457,7 +572,7 @@ class Component():
         self.setup_paths(prefix)
         core_file = self.path / prefix / 'core@0x0/core'
         with core_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             core = self.map.fileToStruct('core', data, fd=f.fileno(),
                                          verbosity=self.verbosity)
             log.debug('{}: {}'.format(self.gcid, core))
@@ -487,6 +602,8 @@ class Component():
             self.cuuid = core.CUUID
             self.serial = core.SerialNumber
             self.cuuid_serial = f'{self.cuuid}:{self.serial:#018x}'
+            if claim is not None and not claim(self.cuuid_serial, self):
+                return self.warn_unusable('being configured via another path')
             if zargs.pause_after is not None and len(self.fab) % zargs.pause_after == 0:
                 set_trace()
             # create and read (but do not HW init) the switch struct
@@ -511,7 +628,8 @@ class Component():
             if pfm and self.cstate is CState.CCFG:
                 if zargs.reclaim:
                     # lookup cuuid_serial and potentially adjust GCID
-                    self.fab.reassign_gcid(self)
+                    with self.fab.lock:
+                        self.fab.reassign_gcid(self)
                 # set CV/CID0/SID0 - first Gen-Z control write if !local_br
                 # Revisit: support subnets and multiple CIDs
                 core.CID0 = self.gcid.cid
@@ -597,12 +715,14 @@ class Component():
                 except Exception as e:
                     return self.warn_unusable(f'add_fab_comp(gcid={self.gcid},tmp_gcid={self.tmp_gcid},dr={self.dr}) failed with exception {e}')
                 # replace DR routes from PFM with non-DR versions
-                self.fab.replace_dr_routes(pfm, self)
+                with self.fab.lock:
+                    self.fab.replace_dr_routes(pfm, self)
             # end if pfm
         # end with
         self.fru_uuid = get_fru_uuid(self.path)
-        self.fab.add_comp(self)
-        self.fab.update_assigned_gcids(self)
+        with self.fab.lock:
+            self.fab.add_comp(self)
+            self.fab.update_assigned_gcids(self)
         # initialize Responder Page Grid structure
         # Revisit: should we be doing this when reclaiming a C-Up comp?
         self.rsp_page_grid_init(core, readOnly=not pfm)
@@ -729,10 +849,13 @@ class Component():
             # Revisit: set MaxPwrCtl (to NPWR?)
             # invalidate SSDT (except PFM CID written earlier)
             # Revisit: should we be doing this when reclaiming a C-Up comp?
+            self.ssdt_load()  # one read, not one per (lazily loaded) row
             for cid in range(0, rows):
                 if cid != pfm.gcid.cid or ingress_iface is None:
                     for rt in range(0, cols):
-                        self.ssdt_write(cid, 0x780|cid, rt=rt, valid=0) # Revisit: ei debug
+                        self.ssdt_write(cid, 0x780|cid, rt=rt, valid=0, # Revisit: ei debug
+                                        flush=False)
+            self.ssdt_flush()
             # initialize REQ-VCAT
             # Revisit: multiple Action columns
             for vc in range(0, self.req_vcat_size(prefix=prefix)[0]):
@@ -778,9 +901,10 @@ class Component():
             except AllOnesData:
                 return self.warn_unusable('switch_init returned all-ones data')
         self.comp_err_signal_init(core)
-        if self.usable and self.is_requester:
-            self.fab.rkds.add_comps_to_rkd([self], self.fab.all_rkd)
-        self.fab.update_comp(self, forceTimestamp=True)
+        with self.fab.lock:
+            if self.usable and self.is_requester:
+                self.fab.rkds.add_comps_to_rkd([self], self.fab.all_rkd)
+            self.fab.update_comp(self, forceTimestamp=True)
         return self.usable
 
     def opcode_set_init(self):
@@ -789,7 +913,7 @@ class Component():
         genz = zephyr_conf.genz
         opcode_set_file = self.opcode_set_dir / 'opcode_set'
         with opcode_set_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             opcode_set = self.map.fileToStruct('opcode_set', data, fd=f.fileno(),
                                                verbosity=self.verbosity)
             if opcode_set.all_ones_type_vers_size():
@@ -808,7 +932,7 @@ class Component():
         # end with
         opcode_set_table_file = self.opcode_set_table_dir / 'opcode_set_table'
         with opcode_set_table_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             opcode_set_table = self.map.fileToStruct('opcode_set_table',
                                                      data, fd=f.fileno(),
                                                      path=opcode_set_table_file,
@@ -969,7 +1093,7 @@ class Component():
             return
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -981,7 +1105,7 @@ class Component():
     def clear_cerror_status(self, bitNum):
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -998,7 +1122,7 @@ class Component():
     def clear_cevent_status(self, bitNum):
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -1015,7 +1139,7 @@ class Component():
     def clear_ievent_status(self, bitNum):
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -1064,7 +1188,7 @@ class Component():
             return
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -1107,7 +1231,7 @@ class Component():
             return
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -1121,7 +1245,7 @@ class Component():
         genz = zephyr_conf.genz
         ces_file = self.ces_dir / 'component_error_and_signal_event'
         with ces_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             ces = self.map.fileToStruct('component_error_and_signal_event',
                                         data, fd=f.fileno(),
                                         verbosity=self.verbosity)
@@ -1177,11 +1301,12 @@ class Component():
             self.pfm_uep_init(ces, self.fab.pfm)
         # end with
 
+    @timed()
     def switch_init(self, core) -> None:
         genz = zephyr_conf.genz
         switch_file = self.switch_dir / 'component_switch'
         with switch_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             switch = self.map.fileToStruct('component_switch', data, fd=f.fileno(),
                                            verbosity=self.verbosity)
             if switch.all_ones_type_vers_size():
@@ -1205,7 +1330,7 @@ class Component():
             log.warning(f'{self}: component has Rsp Page Grid but MaxData==0')
             return
         rsp_pte_table_file = self.rsp_pte_table_dir / 'pte_table'
-        with rsp_pte_table_file.open(mode='rb+') as f:
+        with zephyr_conf.files.open(rsp_pte_table_file) as f:
             pte_table = self.rsp_pte_table
             pte_table.set_fd(f)
             ps_bytes = 1 << ps
@@ -1220,9 +1345,10 @@ class Component():
                 # Revisit: add PA/CCE/CE/WPE/PSE/LPE/IE/PFE/RKMGR/PASID/RK_MGR
                 self.control_write(pte_table, pte_table.element.V,
                                    off=pte_table.element.Size*i,
-                                   sz=pte_table.element.Size)
+                                   sz=pte_table.element.Size, defer=True)
                 local_addr += ps_bytes # Revisit: alignment
             # end for
+            self.control_flush(pte_table)
         # end with
 
     def caccess_update(self, chunk: 'ChunkTuple',
@@ -1232,7 +1358,7 @@ class Component():
             return
         ps = self.caccess_ps
         caccess_rkey_file = self.caccess_rkey_dir / 'c_access_r_key'
-        with caccess_rkey_file.open(mode='rb+') as f:
+        with zephyr_conf.files.open(caccess_rkey_file) as f:
             caccess_rkey = self.caccess_rkey
             caccess_rkey.set_fd(f)
             ps_bytes = 1 << ps
@@ -1243,8 +1369,9 @@ class Component():
                 caccess_rkey[i].RWRKey = chunk.rw_rkey if valid else NO_ACCESS_RKEY.val
                 self.control_write(caccess_rkey, caccess_rkey.element.RORKey,
                                    off=caccess_rkey.element.Size*i,
-                                   sz=caccess_rkey.element.Size)
+                                   sz=caccess_rkey.element.Size, defer=True)
             # end for
+            self.control_flush(caccess_rkey)
         # end with
 
     def peer_attr_init(self, readOnly=False):
@@ -1257,6 +1384,7 @@ class Component():
             self.pa_write(0, 0) # LL
             self.pa_write(1, 1) # NLL
 
+    @timed()
     def rsp_page_grid_init(self, core, readOnly=False):
         if self.rsp_pg_dir is None:
             return
@@ -1266,7 +1394,7 @@ class Component():
         # Revisit: return if rsp_pg should be host managed
         rsp_pg_file = self.rsp_pg_dir / 'component_page_grid'
         with rsp_pg_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             pg = self.map.fileToStruct('component_page_grid', data,
                                        fd=f.fileno(),
                                        verbosity=self.verbosity)
@@ -1285,7 +1413,7 @@ class Component():
         self.rsp_page_grid_ps = ps
         rsp_pg_table_file = self.rsp_pg_table_dir / 'pg_table'
         with rsp_pg_table_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             pg_table = self.map.fileToStruct('pg_table', data,
                                              path=rsp_pg_table_file,
                                              fd=f.fileno(), parent=pg,
@@ -1303,15 +1431,19 @@ class Component():
                     pg_table[i].PageCount = 0
                 for i in range(0, pg.PGTableSz):
                     self.control_write(pg_table, pg_table.element.R0,
-                                       off=16*i, sz=16)
+                                       off=16*i, sz=16, defer=True)
+                self.control_flush(pg_table)
         # end with
         rsp_pte_table_file = self.rsp_pte_table_dir / 'pte_table'
         with rsp_pte_table_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            # when readOnly, later rsp_pte_update() calls read only the
+            # PTEs they change; otherwise, every PTE is rewritten below
+            data = None if readOnly else self.control_data(f)
             pte_table = self.map.fileToStruct('pte_table', data,
                                               path=rsp_pte_table_file,
                                               fd=f.fileno(), parent=pg,
-                                              verbosity=self.verbosity)
+                                              verbosity=self.verbosity,
+                                              lazy=readOnly)
             log.debug('{self}: {pte_table}')
             self.rsp_pte_table = pte_table # for rsp_pte_update()
             if not readOnly:
@@ -1323,7 +1455,8 @@ class Component():
                 for i in range(0, pg.PTETableSz):
                     self.control_write(pte_table, pte_table.element.V,
                                        off=pte_table.element.Size*i,
-                                       sz=pte_table.element.Size)
+                                       sz=pte_table.element.Size, defer=True)
+                self.control_flush(pte_table)
         # end with
 
     def caccess_rkey_init(self, readOnly=False):
@@ -1332,7 +1465,7 @@ class Component():
             return
         caccess_file = self.caccess_dir / 'component_c_access'
         with caccess_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             caccess = self.map.fileToStruct('component_c_access', data,
                                             fd=f.fileno(),
                                             verbosity=self.verbosity)
@@ -1345,7 +1478,7 @@ class Component():
         self.caccess_ps = cpage_sz.ps()
         caccess_rkey_file = self.caccess_rkey_dir / 'c_access_r_key'
         with caccess_rkey_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             caccess_rkey = self.map.fileToStruct('c_access_r_key', data,
                                                  path=caccess_rkey_file,
                                                  fd=f.fileno(), parent=caccess,
@@ -1358,8 +1491,10 @@ class Component():
                     caccess_rkey[i].RWRKey = NO_ACCESS_RKEY.val
                     self.control_write(caccess_rkey, caccess_rkey.element.RORKey,
                                        off=caccess_rkey.element.Size*i,
-                                       sz=caccess_rkey.element.Size)
+                                       sz=caccess_rkey.element.Size,
+                                       defer=True)
                 # end for
+                self.control_flush(caccess_rkey)
             # end if
         # end with
         # set CAccessCTL.RKeyEnb
@@ -1379,7 +1514,7 @@ class Component():
             'component_destination_table@*'))[0]
         comp_dest_file = self.comp_dest_dir / 'component_destination_table'
         with comp_dest_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             comp_dest = self.map.fileToStruct(
                 'component_destination_table',
                 data, fd=f.fileno(), verbosity=self.verbosity)
@@ -1397,7 +1532,7 @@ class Component():
             return self.component_pa
         component_pa_file = self.component_pa_dir / 'component_pa'
         with component_pa_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             component_pa = self.map.fileToStruct(
                 'component_pa',
                 data, fd=f.fileno(), verbosity=self.verbosity)
@@ -1415,7 +1550,7 @@ class Component():
             return self.service_uuid_table
         service_uuid_file = self.service_uuid_dir / 'service_uuid'
         with service_uuid_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             service_uuid = self.map.fileToStruct(
                 'service_uuid',
                 data, fd=f.fileno(), verbosity=self.verbosity)
@@ -1424,7 +1559,7 @@ class Component():
         # end with
         service_uuid_table_file = self.service_uuid_table_dir / 's_uuid'
         with service_uuid_table_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             service_uuid_table = self.map.fileToStruct(
                 's_uuid', data,
                 parent=service_uuid, fd=f.fileno(), verbosity=self.verbosity)
@@ -1437,7 +1572,7 @@ class Component():
             return self.pt
         precision_time_file = self.precision_time_dir / 'component_precision_time'
         with precision_time_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             precision_time = self.map.fileToStruct(
                 'component_precision_time',
                 data, fd=f.fileno(), verbosity=self.verbosity)
@@ -1467,7 +1602,7 @@ class Component():
         if rc_dir is not None:
             rc_path = rc_dir / 'route_control'
             with rc_path.open(mode='rb') as f:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 rc = self.map.fileToStruct('route_control', data,
                                 parent=self.core.sw, core=self.core,
                                 fd=f.fileno(), verbosity=self.verbosity)
@@ -1486,7 +1621,7 @@ class Component():
             return self.core.sw
         switch_file = self.switch_dir / 'component_switch'
         with switch_file.open(mode='rb') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             self.core.sw = self.map.fileToStruct('component_switch',
                                 data, fd=f.fileno(), verbosity=self.verbosity)
             if self.core.sw.all_ones_type_vers_size():
@@ -1506,11 +1641,10 @@ class Component():
     def rit_write(self, iface, eim):
         if self.rit_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         rit_file = self.rit_dir / 'rit'
-        with rit_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(rit_file) as f:
             if self.rit is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.rit = self.map.fileToStruct('rit', data, path=rit_file,
                                      fd=f.fileno(), verbosity=self.verbosity)
             else:
@@ -1534,11 +1668,10 @@ class Component():
     def req_vcat_write(self, vc, vcm, action=0, th=None):
         if self.req_vcat_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         req_vcat_file = self.req_vcat_dir / 'req_vcat'
-        with req_vcat_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(req_vcat_file) as f:
             if self.req_vcat is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.req_vcat = self.map.fileToStruct('req_vcat', data,
                                     path=req_vcat_file, parent=self.comp_dest,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1565,11 +1698,10 @@ class Component():
     def rsp_vcat_write(self, vc, vcm, action=0, th=None):
         if self.rsp_vcat_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         rsp_vcat_file = self.rsp_vcat_dir / 'rsp_vcat'
-        with rsp_vcat_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(rsp_vcat_file) as f:
             if self.rsp_vcat is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.rsp_vcat = self.map.fileToStruct('rsp_vcat', data,
                                     path=rsp_vcat_file, parent=self.comp_dest,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1584,11 +1716,10 @@ class Component():
     def rkd_write(self, rkd: 'RKD', enable=True):
         if self.rkd_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         rkd_file = self.rkd_dir / 'component_rkd'
-        with rkd_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(rkd_file) as f:
             if self.rkd is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.rkd = self.map.fileToStruct('component_rkd', data, path=rkd_file,
                                     core=self.core, parent=self.core,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1640,36 +1771,50 @@ class Component():
     def compute_mhc_hc(self, cid: int, rt: int, hc: int, valid: int):
         if self.ssdt is None:
             return (hc, hc, valid, rt != 0, False)
-        row = self.ssdt[cid]
+        row = self.ssdt_row(cid)
         info = self.route_info[cid][rt]
         return self.compute_mhc_hc_row(row, info, cid, rt, hc, valid)
 
     def ssdt_read(self):
         if self.ssdt is not None or self.ssdt_dir is None:
             return self.ssdt
-        # Revisit: avoid open/close (via "with") on every read?
         ssdt_file = self.ssdt_dir / 'ssdt'
-        with ssdt_file.open(mode='rb+', buffering=0) as f:
-            data = bytearray(f.read())
-            self.ssdt = self.map.fileToStruct('ssdt', data, path=ssdt_file,
+        with zephyr_conf.files.open(ssdt_file) as f:
+            # rows are read on demand - see ControlTableArray.load()
+            self.ssdt = self.map.fileToStruct('ssdt', None, path=ssdt_file,
                                     core=self.core, parent=self.comp_dest,
-                                    fd=f.fileno(), verbosity=self.verbosity)
+                                    fd=f.fileno(), verbosity=self.verbosity,
+                                    lazy=True)
+            self.ssdt.set_fd(f)
         return self.ssdt
 
+    def ssdt_row(self, cid):
+        '''Return SSDT row "cid", reading it from the current SSDT file
+        if it has not been loaded yet'''
+        with zephyr_conf.files.open(self.ssdt_dir / 'ssdt') as f:
+            self.ssdt.set_fd(f)
+            return self.ssdt[cid]
+
+    def ssdt_load(self):
+        '''Read the whole SSDT at once, e.g., before rewriting every row'''
+        if self.ssdt_read() is None:
+            return
+        with zephyr_conf.files.open(self.ssdt_dir / 'ssdt') as f:
+            self.ssdt.set_fd(f)
+            self.ssdt.load()
+
     def ssdt_write(self, cid, ei, rt=0, valid=1, mhc=None, hc=None, vca=None,
-                   mhcOnly=False):
+                   mhcOnly=False, flush=True):
         if self.ssdt_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         ssdt_file = self.ssdt_dir / 'ssdt'
-        with ssdt_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(ssdt_file) as f:
             if self.ssdt is None:
-                data = bytearray(f.read())
-                self.ssdt = self.map.fileToStruct('ssdt', data, path=ssdt_file,
+                self.ssdt = self.map.fileToStruct('ssdt', None, path=ssdt_file,
                                     core=self.core, parent=self.comp_dest,
-                                    fd=f.fileno(), verbosity=self.verbosity)
-            else:
-                self.ssdt.set_fd(f)
+                                    fd=f.fileno(), verbosity=self.verbosity,
+                                    lazy=True)
+            self.ssdt.set_fd(f)
             sz = ctypes.sizeof(self.ssdt.element)
             self.ssdt[cid][rt].MHC = mhc if (mhc is not None and rt == 0) else 0
             if not mhcOnly:
@@ -1678,7 +1823,20 @@ class Component():
                 self.ssdt[cid][rt].HC = hc if hc is not None else 0
                 self.ssdt[cid][rt].VCA = vca if vca is not None else 0
             self.control_write(self.ssdt, self.ssdt.element.MHC,
-                               off=self.ssdt.cs_offset(cid, rt), sz=sz)
+                               off=self.ssdt.cs_offset(cid, rt), sz=sz,
+                               defer=True)
+            if flush:
+                self.control_flush(self.ssdt)
+        # end with
+
+    def ssdt_flush(self):
+        '''Write SSDT entries deferred by ssdt_write(flush=False)'''
+        if self.ssdt_dir is None or self.ssdt is None:
+            return
+        ssdt_file = self.ssdt_dir / 'ssdt'
+        with zephyr_conf.files.open(ssdt_file) as f:
+            self.ssdt.set_fd(f)
+            self.control_flush(self.ssdt)
         # end with
 
     def fixup_ssdt(self, routes, pfm) -> None:
@@ -1705,10 +1863,9 @@ class Component():
     def ssap_read(self):
         if self.ssap is not None or self.ssap_dir is None:
             return self.ssap
-        # Revisit: avoid open/close (via "with") on every read?
         ssap_file = self.ssap_dir / 'ssap'
-        with ssap_file.open(mode='rb+', buffering=0) as f:
-            data = bytearray(f.read())
+        with zephyr_conf.files.open(ssap_file) as f:
+            data = self.control_data(f)
             self.ssap = self.map.fileToStruct('ssap', data, path=ssap_file,
                                     core=self.core, parent=self.comp_pa,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1717,11 +1874,10 @@ class Component():
     def ssap_write(self, cid, akey: AKey = None, acreq=None, acrsp=None, paIdx=None):
         if self.ssap_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         ssap_file = self.ssap_dir / 'ssap'
-        with ssap_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(ssap_file) as f:
             if self.ssap is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.ssap = self.map.fileToStruct('ssap', data, path=ssap_file,
                                     core=self.core, parent=self.component_pa,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1764,10 +1920,9 @@ class Component():
     def pa_read(self):
         if self.pa is not None or self.peer_attr_dir is None:
             return self.pa
-        # Revisit: avoid open/close (via "with") on every read?
         pa_file = self.peer_attr_dir / 'pa'
-        with pa_file.open(mode='rb+', buffering=0) as f:
-            data = bytearray(f.read())
+        with zephyr_conf.files.open(pa_file) as f:
+            data = self.control_data(f)
             self.pa = self.map.fileToStruct('pa', data, path=pa_file,
                                     core=self.core, parent=self.component_pa,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1776,11 +1931,10 @@ class Component():
     def pa_write(self, paIdx, latDom):
         if self.peer_attr_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         pa_file = self.peer_attr_dir / 'pa'
-        with pa_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(pa_file) as f:
             if self.pa is None:
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 self.pa = self.map.fileToStruct('pa', data, path=pa_file,
                                     core=self.core, parent=self.component_pa,
                                     fd=f.fileno(), verbosity=self.verbosity)
@@ -1814,7 +1968,7 @@ class Component():
         cap1ctl.AKeyEnb = enb
         comp_pa.PACAP1Control = cap1ctl.val
         component_pa_file = self.component_pa_dir / 'component_pa'
-        with component_pa_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(component_pa_file) as f:
             comp_pa.set_fd(f)
             self.control_write(comp_pa, genz.ComponentPAStructure.PACAP1Control, sz=4)
 
@@ -1979,6 +2133,8 @@ class Component():
 
     def update_path(self):
         log.debug('current path: {}'.format(self.path))
+        zephyr_conf.files.invalidate(self.path)
+        self.core_cache_invalidate()
         self.path = self.fab.make_path(self.gcid)
         log.debug('new path: {}'.format(self.path))
         self.update_ssdt_dir()
@@ -2034,7 +2190,7 @@ class Component():
         return (acreq, acrsp)
 
     def explore_interface(self, iface, pfm, ingress_iface,
-                          send=False, reclaim=False):
+                          send=False, reclaim=False, crawl=None):
         '''Explore one interface, @iface, on this component and initialize
         the peer Component connected to it. Recurse if the component has a
         switch.
@@ -2093,60 +2249,75 @@ class Component():
                 msg += ' peer is C-Up but GCID not valid - ignoring peer'
                 log.warning(msg)
                 return
-            if peer_gcid in self.fab.comp_gcids: # another path?
-                comp = self.fab.comp_gcids[peer_gcid]
-                peer_iface = comp.interfaces[iface.peer_iface_num]
-                iface.set_peer_iface(peer_iface)
-                if peer_iface != iface.prev_peer_iface:  # different peer
-                    self.fab.remove_link(iface, iface.prev_peer_iface)
-                    # Revisit: send msg to SFM
+            # the lock is only held for fabric bookkeeping - the in-band
+            # control reads/writes are done without it, so they overlap
+            with self.fab.lock:
+                comp = self.fab.comp_gcids.get(peer_gcid)
+                if comp is not None: # another path
+                    peer_iface = comp.interfaces[iface.peer_iface_num]
+                    iface.set_peer_iface(peer_iface)
+                    if peer_iface != iface.prev_peer_iface:  # different peer
+                        self.fab.remove_link(iface, iface.prev_peer_iface)
+                        # Revisit: send msg to SFM
+            # end with
+            if comp is not None:
                 # bring peer iface to I-Up (if it isn't already)
                 peer_istate, _ = peer_iface.iface_state()
                 if peer_istate is not IState.IUp:
                     peer_iface.iface_init(no_akeys=zargs.no_akeys)
                 nonce_valid = iface.do_nonce_exchange()
                 if not nonce_valid:
-                    iface.set_peer_iface(None)
+                    with self.fab.lock:
+                        iface.set_peer_iface(None)
                     msg += ' nonce mismatch'
                     log.warning(msg)
                     # Revisit: contact foreign FM
                     return
-                added = self.fab.add_link(iface, peer_iface)
-                # Revisit: use added to determine what to do
-                msg += ' additional path to {}'.format(comp)
-                log.info(msg)
-                # new path might enable additional or shorter routes
-                self.fab.recompute_routes(iface, peer_iface)
+                with self.fab.lock:
+                    added = self.fab.add_link(iface, peer_iface)
+                    # Revisit: use added to determine what to do
+                    msg += ' additional path to {}'.format(comp)
+                    log.info(msg)
+                    # new path might enable additional or shorter routes
+                    self.fab.recompute_routes(iface, peer_iface)
+                # end with
             elif reclaim:
+                if crawl is not None and not crawl.claim(peer_gcid, iface):
+                    # another worker is reclaiming it; known by next wave
+                    crawl.add(self, iface, ingress_iface)
+                    return
                 msg += ', reclaiming C-Up component'
-                path = self.fab.make_path(peer_gcid)
-                comp = Component(iface.peer_cclass, self.fab, self.map, path,
-                                 self.mgr_uuid, br_gcid=self.br_gcid,
-                                 netlink=self.nl, verbosity=self.verbosity)
-                peer_iface = Interface(comp, iface.peer_iface_num, iface,
-                                       usable=True)
-                comp.found_cstate = peer_cstate
-                iface.set_peer_iface(peer_iface)
-                if peer_iface != iface.prev_peer_iface:  # different peer
-                    self.fab.remove_link(iface, iface.prev_peer_iface)
-                    # Revisit: send msg to SFM
-                gcid = self.fab.assign_gcid(comp, proposed_gcid=peer_gcid,
-                                            reclaim=reclaim)
-                if gcid is None:
-                    msg += ', gcid conflict, reset required'
-                    log.warning(msg)
-                    reset_required = True
-                    peer_c_reset_only = True
-                    routes = None
-                else:
-                    msg += ', retaining gcid={}'.format(gcid)
-                    log.info(msg)
-                if path.exists():
-                    comp.remove_fab_comp(force=True)
+                with self.fab.lock:
+                    path = self.fab.make_path(peer_gcid)
+                    comp = Component(iface.peer_cclass, self.fab, self.map, path,
+                                     self.mgr_uuid, br_gcid=self.br_gcid,
+                                     netlink=self.nl, verbosity=self.verbosity)
+                    peer_iface = Interface(comp, iface.peer_iface_num, iface,
+                                           usable=True)
+                    comp.found_cstate = peer_cstate
+                    iface.set_peer_iface(peer_iface)
+                    if peer_iface != iface.prev_peer_iface:  # different peer
+                        self.fab.remove_link(iface, iface.prev_peer_iface)
+                        # Revisit: send msg to SFM
+                    gcid = self.fab.assign_gcid(comp, proposed_gcid=peer_gcid,
+                                                reclaim=reclaim)
+                    if gcid is None:
+                        msg += ', gcid conflict, reset required'
+                        log.warning(msg)
+                        reset_required = True
+                        peer_c_reset_only = True
+                        routes = None
+                    else:
+                        msg += ', retaining gcid={}'.format(gcid)
+                        log.info(msg)
+                    if path.exists():
+                        comp.remove_fab_comp(force=True)
+                    if not reset_required:
+                        self.fab.add_link(iface, peer_iface)
+                        routes = self.fab.setup_bidirectional_routing(
+                            pfm, comp, write_to_ssdt=False)
+                # end with
                 if not reset_required:
-                    self.fab.add_link(iface, peer_iface)
-                    routes = self.fab.setup_bidirectional_routing(
-                        pfm, comp, write_to_ssdt=False)
                     pfm.ssap_write(comp.gcid.cid, self.fab.fm_akey, paIdx=0)
                     try:
                         comp.add_fab_comp(setup=True)
@@ -2160,14 +2331,15 @@ class Component():
                     reset_required = not usable
                     if usable and comp.has_switch:  # if switch, recurse
                         comp.explore_interfaces(pfm, ingress_iface=peer_iface,
-                                                reclaim=reclaim)
+                                                reclaim=reclaim, crawl=crawl)
                 if reset_required:
                     peer_cstate = comp.warm_reset(iface,
                                             peer_c_reset_only=peer_c_reset_only)
                     if peer_cstate is not CState.CCFG:
                         log.warning(f'unable to reset - ignoring component {comp} on {iface}')
                         if routes is not None:
-                            self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
+                            with self.fab.lock:
+                                self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
                         return
             else:
                 msg += ' ignoring unknown component'
@@ -2177,109 +2349,138 @@ class Component():
         # end if CUp
         if peer_cstate is CState.CCFG: # Note: not 'elif'
             from zephyr_route import DirectedRelay
-            if peer_comp is None:
-                dr = DirectedRelay(self, ingress_iface, iface) # temporary dr
-                comp = Component(iface.peer_cclass, self.fab, self.map, dr.path,
-                                 self.mgr_uuid, dr=dr, br_gcid=self.br_gcid,
-                                 netlink=self.nl, verbosity=self.verbosity)
-                peer_iface = Interface(comp, iface.peer_iface_num, iface)
-                iface.set_peer_iface(peer_iface)
-                if peer_iface != iface.prev_peer_iface:  # different peer
-                    self.fab.remove_link(iface, iface.prev_peer_iface)
-                    # Revisit: send msg to SFM
-                # now that we have peer_iface, setup new DR that includes it
-                dr = DirectedRelay(self, ingress_iface, iface, to_iface=peer_iface)
-                comp.set_dr(dr)
-                gcid = self.fab.assign_gcid(comp, reclaim=reclaim,
-                                            cstate=peer_cstate)
-                if gcid is None:
-                    msg += 'no GCID available in pool - ignoring component'
-                    log.warning(msg)
-                    return
-                op = 'add'
-                msg += 'assigned gcid={}'.format(gcid)
-                self.fab.add_link(iface, peer_iface)
-            else: # have a known peer_comp
-                comp = peer_comp
-                peer_iface = iface.peer_iface
-                dr = DirectedRelay(self, ingress_iface, iface, to_iface=peer_iface)
-                comp.set_dr(dr)
-                gcid = comp.gcid
-                op = 'change'
-                msg += 'reusing previously-assigned gcid={}'.format(gcid)
-            if not reset_required:
-                comp.found_cstate = peer_cstate
-            # deal with "leftover" comp path from previous zephyr run
-            path = self.fab.make_path(gcid)
-            if path.exists():
-                leftover = Component(iface.peer_cclass, self.fab, self.map,
-                                     path, self.mgr_uuid,
-                                     gcid=gcid, br_gcid=self.br_gcid,
-                                     netlink=self.nl, verbosity=self.verbosity)
-                leftover.remove_fab_comp(force=True)
-                self.fab.remove_node(leftover)
-                del self.fab.components[leftover.uuid]
-            log.info(msg)
-            routes = self.fab.setup_bidirectional_routing(
-                pfm, comp, write_to_ssdt=False) # comp_init() will write SSDT
-            pfm.ssap_write(comp.gcid.cid, self.fab.fm_akey, paIdx=0)
-            try:
-                comp.add_fab_dr_comp()
-            except Exception as e:
-                log.error(f'add_fab_dr_comp(gcid={comp.gcid}, dr_gcid={comp.dr.gcid}, dr_iface={comp.dr.egress_iface}) failed with exception {e}')
-                self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
+            if (crawl is not None and peer_comp is not None and
+                peer_comp.cuuid_serial is not None and
+                not crawl.claim(peer_comp.cuuid_serial, peer_comp)):
+                # another worker is configuring it; C-Up by next wave
+                crawl.add(self, iface, ingress_iface)
                 return
+            with self.fab.lock:
+                if peer_comp is None:
+                    dr = DirectedRelay(self, ingress_iface, iface) # temporary dr
+                    comp = Component(iface.peer_cclass, self.fab, self.map, dr.path,
+                                     self.mgr_uuid, dr=dr, br_gcid=self.br_gcid,
+                                     netlink=self.nl, verbosity=self.verbosity)
+                    peer_iface = Interface(comp, iface.peer_iface_num, iface)
+                    iface.set_peer_iface(peer_iface)
+                    if peer_iface != iface.prev_peer_iface:  # different peer
+                        self.fab.remove_link(iface, iface.prev_peer_iface)
+                        # Revisit: send msg to SFM
+                    # now that we have peer_iface, setup new DR that includes it
+                    dr = DirectedRelay(self, ingress_iface, iface, to_iface=peer_iface)
+                    comp.set_dr(dr)
+                    gcid = self.fab.assign_gcid(comp, reclaim=reclaim,
+                                                cstate=peer_cstate)
+                    if gcid is None:
+                        msg += 'no GCID available in pool - ignoring component'
+                        log.warning(msg)
+                        return
+                    op = 'add'
+                    msg += 'assigned gcid={}'.format(gcid)
+                    self.fab.add_link(iface, peer_iface)
+                else: # have a known peer_comp
+                    comp = peer_comp
+                    peer_iface = iface.peer_iface
+                    dr = DirectedRelay(self, ingress_iface, iface, to_iface=peer_iface)
+                    comp.set_dr(dr)
+                    gcid = comp.gcid
+                    op = 'change'
+                    msg += 'reusing previously-assigned gcid={}'.format(gcid)
+                if not reset_required:
+                    comp.found_cstate = peer_cstate
+                # deal with "leftover" comp path from previous zephyr run
+                path = self.fab.make_path(gcid)
+                if path.exists():
+                    leftover = Component(iface.peer_cclass, self.fab, self.map,
+                                         path, self.mgr_uuid,
+                                         gcid=gcid, br_gcid=self.br_gcid,
+                                         netlink=self.nl, verbosity=self.verbosity)
+                    leftover.remove_fab_comp(force=True)
+                    self.fab.remove_node(leftover)
+                    del self.fab.components[leftover.uuid]
+                log.info(msg)
+                routes = self.fab.setup_bidirectional_routing(
+                    pfm, comp, write_to_ssdt=False) # comp_init() will write SSDT
+                pfm.ssap_write(comp.gcid.cid, self.fab.fm_akey, paIdx=0)
+                try:
+                    comp.add_fab_dr_comp()
+                except Exception as e:
+                    log.error(f'add_fab_dr_comp(gcid={comp.gcid}, dr_gcid={comp.dr.gcid}, dr_iface={comp.dr.egress_iface}) failed with exception {e}')
+                    self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
+                    return
+            # end with
+            claim = crawl.claim if crawl is not None else None
             usable = comp.comp_init(pfm, prefix='dr', ingress_iface=peer_iface,
-                                    route=routes[1])
+                                    route=routes[1], claim=claim)
+            if (crawl is not None and comp.cuuid_serial is not None and
+                not crawl.owns(comp.cuuid_serial, comp)):
+                crawl.undo(self, iface, ingress_iface, comp, routes)
+                return
             if send:
                 js = comp.to_json(verbosity=1)
                 self.fab.send_mgrs(['llamas'], 'mgr_topo', 'component', js,
                                    op=op, invertTypes=True)
             if usable and comp.has_switch:  # if switch, recurse
                 comp.explore_interfaces(pfm, ingress_iface=peer_iface,
-                                        send=send, reclaim=reclaim)
+                                        send=send, reclaim=reclaim, crawl=crawl)
             elif not usable:
                 log.warning(f'{comp} is not usable')
-                self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
+                with self.fab.lock:
+                    self.fab.teardown_routing(pfm, comp, routes[0] + routes[1])
         # end if peer_cstate
 
+    def try_explore_interface(self, iface, pfm, ingress_iface,
+                              send=False, reclaim=False, crawl=None):
+        try:
+            self.explore_interface(iface, pfm, ingress_iface,
+                                   send=send, reclaim=reclaim, crawl=crawl)
+        except AllOnesData as e:
+            log.warning(f'{iface}: interface{iface.num} config failed with exception "{e}" - marking unusable')
+            iface.usable = False
+
     def explore_interfaces(self, pfm, ingress_iface=None, explore_ifaces=None,
-                           send=False, reclaim=False):
+                           send=False, reclaim=False, crawl=None):
         '''Explore all interfaces on this component, or just those passed
         in @explore_ifaces, skipping the @ingress_iface and any that are
         not usable.
+
+        With --max-crawl-parallelism > 1, exploration is breadth-first,
+        in waves (see zephyr_crawl.Crawl); with a @crawl, the interfaces
+        are added to its next wave rather than explored now.
         '''
+        zargs = zephyr_conf.args
+        if crawl is None and zargs.max_crawl_parallelism > 1:
+            from zephyr_crawl import Crawl
+            crawl = Crawl(self.fab, pfm, zargs.max_crawl_parallelism,
+                          send=send, reclaim=reclaim)
+            self.explore_interfaces(pfm, ingress_iface=ingress_iface,
+                                    explore_ifaces=explore_ifaces,
+                                    send=send, reclaim=reclaim, crawl=crawl)
+            crawl.run()
+            return
         if explore_ifaces is None:
             # examine all interfaces (except ingress) & init those components
-            zargs = zephyr_conf.args
             explore_ifaces = (reversed(self.interfaces) if zargs.reversed
                               else self.interfaces)
         for iface in explore_ifaces:
             if iface == ingress_iface:
                 log.debug(f'{iface}: skipping ingress interface{iface.num}')
+            elif iface.usable and crawl is not None:
+                crawl.add(self, iface, ingress_iface)
             elif iface.usable:
-                try:
-                    self.explore_interface(iface, pfm, ingress_iface,
+                self.try_explore_interface(iface, pfm, ingress_iface,
                                            send=send, reclaim=reclaim)
-                except AllOnesData as e:
-                    log.warning(f'{iface}: interface{iface.num} config failed with exception "{e}" - marking unusable')
-                    iface.usable = False
             else:
                 log.info(f'{iface}: interface{iface.num} is not usable')
 
     def update_cstate(self, prefix='control', forceTimestamp=False):
         prev_cstate = self.cstate
         genz = zephyr_conf.genz
-        core_file = self.path / prefix / 'core@0x0/core'
-        with core_file.open(mode='rb+') as f:
-            # Revisit: optimize this to avoid reading entire Core struct
-            data = bytearray(f.read())
-            core = self.map.fileToStruct('core', data, fd=f.fileno(),
-                                         verbosity=self.verbosity)
-            cstatus = genz.CStatus(core.CStatus, core, check=True)
-            self.cstate = CState(cstatus.field.CState)
-            if forceTimestamp or (self.cstate != prev_cstate):
-                self.fab.update_mod_timestamp(comp=self)
+        core = self.core_fields('CStatus', prefix=prefix)
+        cstatus = genz.CStatus(core.CStatus, core, check=True)
+        self.cstate = CState(cstatus.field.CState)
+        if forceTimestamp or (self.cstate != prev_cstate):
+            self.fab.update_mod_timestamp(comp=self)
 
     def unreachable_comp(self, to, iface):
         log.warning(f'{self}: unreachable component {to} due to interface {iface} failure')
@@ -2302,7 +2503,7 @@ class Component():
             core_file = self.path / prefix / 'core@0x0/core'
             with core_file.open(mode='rb+') as f:
                 genz = zephyr_conf.genz
-                data = bytearray(f.read())
+                data = self.control_data(f)
                 core = self.map.fileToStruct('core', data, fd=f.fileno(),
                                              verbosity=self.verbosity)
                 try:
@@ -2545,7 +2746,7 @@ class Component():
             return
         precision_time_file = self.precision_time_dir / 'component_precision_time'
         with precision_time_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.control_data(f)
             pt = self.map.fileToStruct('component_precision_time',
                                        data, fd=f.fileno(), verbosity=self.verbosity)
             if pt.all_ones_type_vers_size():
@@ -2598,6 +2799,8 @@ class LocalBridge(Bridge):
 
     def update_path(self):
         log.debug('current path: {}'.format(self.path))
+        zephyr_conf.files.invalidate(self.path)
+        self.core_cache_invalidate()
         sys_devices = Path('/sys/devices')
         fabrics = sys_devices.glob('genz*')
         for fab_path in fabrics:
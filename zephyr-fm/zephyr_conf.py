@@ -28,6 +28,9 @@ import yaml
 import json
 import os
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
 from uuid import UUID
 from pdb import set_trace
 from genz.genz_common import GCID, CState
@@ -40,11 +43,79 @@ with open('zephyr-fm/logging.yaml', 'r') as f:
 
 log = logging.getLogger('zephyr')
 
+class ControlFiles():
+    '''LRU cache of open control structure files, keyed by path.
+
+    Frequently written structures like the SSDT, LPRT and VCAT are
+    written through a file from this cache rather than being opened and
+    closed on every write. At most "limit" files are kept open; a file
+    in use by open() is never closed out from under its user.
+    '''
+    def __init__(self, limit=128):
+        self.limit = limit
+        self._files = OrderedDict()  # path -> [file, users]
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._files)
+
+    def _evict(self):
+        for path in list(self._files.keys()):
+            if len(self._files) <= self.limit:
+                break
+            if self._files[path][1] == 0:
+                self._files.pop(path)[0].close()
+
+    @contextmanager
+    def open(self, path):
+        '''Use like path.open(mode='rb+', buffering=0) in a "with"
+        statement, except that the file is left open on exit. The file
+        is shared by every user of "path", so use only positional I/O
+        (os.pread/os.pwrite) on it - never the file position.
+        '''
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                self.misses += 1
+                entry = [path.open(mode='rb+', buffering=0), 0]
+                self._files[path] = entry
+            else:
+                self.hits += 1
+                self._files.move_to_end(path)
+            entry[1] += 1
+            self._evict()
+        try:
+            yield entry[0]
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0 and self._files.get(path) is not entry:
+                    entry[0].close()  # invalidated while in use
+
+    def invalidate(self, dir):
+        '''Close all files under "dir", whose paths are no longer valid'''
+        if dir is None:
+            return
+        with self._lock:
+            for path in [p for p in self._files.keys()
+                         if p.is_relative_to(dir)]:
+                entry = self._files.pop(path)
+                if entry[1] == 0:
+                    entry[0].close()
+
+    def __str__(self):
+        return 'ControlFiles: {} open, {} hits, {} misses'.format(
+            len(self), self.hits, self.misses)
+
 def init(a, gz):
     global args
     global genz
+    global files
     args = a
     genz = gz
+    files = ControlFiles(limit=a.max_open_files)
     
 # Magic to get JSONEncoder to call to_json method, if it exists
 def _default(self, obj):
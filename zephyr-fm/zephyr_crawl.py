@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# Copyright  ©  2026 IntelliProp Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from zephyr_conf import log
+
+class Crawl():
+    '''Breadth-first fabric crawl-out, in waves.
+
+    Component.explore_interfaces() with a Crawl does not recurse into
+    the switches it finds; their interfaces are added to the next wave
+    instead. The interfaces of each wave are explored by up to
+    @workers threads, so the (slow) directed-relay configuration of all
+    the C-CFG peers in a wave overlaps. All changes to the fabric graph,
+    GCIDs and routes are made holding fab.lock.
+
+    A wave can reach the same component by two paths. Only one worker
+    may configure it: the others fail claim(), undo what they have done
+    and retry their interface in the next wave, when the component will
+    be C-Up and is handled as another path to a known component.
+    '''
+    def __init__(self, fab, pfm, workers, send=False, reclaim=False):
+        self.fab = fab
+        self.pfm = pfm
+        self.workers = workers
+        self.send = send
+        self.reclaim = reclaim
+        self.next_wave = []  # (comp, iface, ingress_iface) tuples
+        self.claimed = {}    # key: cuuid_serial or GCID, for this wave
+        self.lock = Lock()
+
+    def add(self, comp, iface, ingress_iface):
+        '''Explore @iface of @comp in the next wave'''
+        with self.lock:
+            self.next_wave.append((comp, iface, ingress_iface))
+
+    def claim(self, key, owner) -> bool:
+        '''Claim the component identified by @key (cuuid_serial or GCID)
+        for @owner. Returns False if it is already claimed by another.
+        '''
+        with self.lock:
+            cur = self.claimed.setdefault(key, owner)
+            return cur is owner
+
+    def owns(self, key, owner) -> bool:
+        with self.lock:
+            return self.claimed.get(key, owner) is owner
+
+    def undo(self, sw, iface, ingress_iface, comp, routes):
+        '''Undo the DR setup of new component @comp, which lost its claim,
+        and retry @iface of @sw in the next wave
+        '''
+        fab = self.fab
+        log.info(f'{iface}: {comp} is being configured via another path - retrying next wave')
+        with fab.lock:
+            fab.teardown_routing(self.pfm, comp, routes[0] + routes[1])
+            comp.remove_fab_dr_comp()
+            fab.remove_node(comp)
+            del fab.components[comp.uuid]
+            fab.avail_cids.append(comp.gcid.cid) # Revisit: random_cids
+            iface.set_peer_iface(None)
+        self.add(sw, iface, ingress_iface)
+
+    def explore(self, item, span=None):
+        comp, iface, ingress_iface = item
+        with self.fab.metrics.attach(span):  # worker spans nest under the wave
+            comp.try_explore_interface(iface, self.pfm, ingress_iface,
+                                       send=self.send, reclaim=self.reclaim,
+                                       crawl=self)
+
+    def run(self):
+        wave = 0
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='crawl') as pool:
+            while len(self.next_wave) > 0:
+                items, self.next_wave = self.next_wave, []
+                self.claimed.clear()
+                log.info(f'crawl wave {wave}: exploring {len(items)} interfaces')
+                with self.fab.metrics.span('crawl_wave') as span:
+                    # list() waits for the whole wave and re-raises any exception
+                    list(pool.map(self.explore, items,
+                                  [span] * len(items)))
+                wave += 1
+        # end with
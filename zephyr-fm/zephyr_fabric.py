@@ -41,7 +41,7 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from base64 import b64encode, b64decode
 from heapq import nlargest, nsmallest
 from zeroconf import Zeroconf, ServiceInfo, ServiceBrowser
-from threading import Thread
+from threading import Thread, RLock
 from collections import defaultdict
 import zephyr_conf
 from zephyr_conf import log, INVALID_GCID
@@ -53,6 +53,12 @@ from zephyr_route import RouteElement, Routes, Route, RoutesTuple
 from zephyr_res import Resources
 from zephyr_rkey import RKD, RKDs
 from zephyr_akey import AKeys, Partitions
+from zephyr_metrics import Metrics, timed
+from zephyr_hops import HopMatrix
+
+# all_shortest_paths() defaults, shared by the recompute_routes() filter
+CUTOFF_FACTOR = 3.0  # max path length, relative to the shortest path
+MIN_PATHS = 2        # paths returned regardless of the cutoff
 
 # Revisit: copied from zephyr_subsys.py
 # Magic to get JSONEncoder to call to_json method, if it exists
@@ -95,14 +101,13 @@ class Fabric(nx.MultiGraph):
     events = {} # UEP events dispatch dict
 
     @staticmethod
-    def link_weight(fr: Component, to: Component, edge_dict):
-        fr_iface = edge_dict[str(fr.uuid)]
-        to_iface = edge_dict[str(to.uuid)]
-        # return None for unusable links - DR interfaces are always usable
-        usable = ((fr.dr is not None or fr_iface.usable) and
-                  (to.dr is not None or to_iface.usable))
-        # Revisit: consider bandwidth, latency, LWR
-        return 1 if usable else None
+    def link_usable(fr_iface: Interface, to_iface: Interface) -> bool:
+        fr = fr_iface.comp
+        to = to_iface.comp
+        # DR interfaces are always usable
+        # Revisit: routes are by hop count; consider bandwidth, latency, LWR
+        return ((fr.dr is not None or fr_iface.usable) and
+                (to.dr is not None or to_iface.usable))
 
     @staticmethod
     def pt_link_weight(fr: Component, to: Component, edge_dict, gtc_path_len):
@@ -157,7 +162,10 @@ class Fabric(nx.MultiGraph):
                         self.akeys.alloc_akey([], proposed_akey=proposed_akey))
         self.partitions = Partitions(self)
         self.promote_sfm_refcount = RefCount()
-        self._g = None  # Graph() for routing
+        # single writer of graph/GCID/routing state during parallel crawl-out
+        self.lock = RLock()
+        self.hops = HopMatrix(self, Fabric.link_usable)  # for routing
+        self.metrics = Metrics()  # per-phase timing & control I/O counts
         mgr_uuids = [] if self.mgr_uuid is None else [self.mgr_uuid]
         ns = time.time_ns()
         super().__init__(fab_uuid=self.fab_uuid, mgr_uuids=mgr_uuids,
@@ -254,7 +262,6 @@ class Fabric(nx.MultiGraph):
         self.cuuid_serial[comp.cuuid_serial] = comp
         self.comp_gcids[comp.gcid] = comp
         self.update_comp(comp)
-        self._g = None  # will be recreated in all_shortest_paths()
 
     def get_mod_timestamp(self, comp=None) -> Tuple:
         return (self.graph['mod_timestamp'],
@@ -330,6 +337,7 @@ class Fabric(nx.MultiGraph):
         serial = get_serial(br_path)
         return str(cuuid) + ':' + serial
 
+    @timed(comp=None, fab=lambda self, *args, **kwargs: self)
     def fab_init(self, reclaim=False):
         zephyr_conf.is_sfm = False
         for br_path in self.br_paths():
@@ -373,6 +381,7 @@ class Fabric(nx.MultiGraph):
             comp.ievent_update(newPeerComp=True)
         # Enable Precision Time (if supported)
         self.pt_init()
+        log.debug(zephyr_conf.genz.controlTypeCache)
 
     def pt_init(self):
         self.gtc = None
@@ -511,20 +520,10 @@ class Fabric(nx.MultiGraph):
                        op='change', invertTypes=True)
 
     def all_shortest_paths(self, fr: Component, to: Component,
-                           cutoff_factor: float = 3.0,
-                           min_paths: int = 2,
+                           cutoff_factor: float = CUTOFF_FACTOR,
+                           min_paths: int = MIN_PATHS,
                            max_paths: int = None) -> List[List[Component]]:
-        # Revisit: need to control how multi-edge attributes are merged so that
-        # link_weight returns the right answer (especially for returning "None")
-        if self._g is None:
-            # shortest_simple_paths does not work on a MultiGraph
-            self._g = nx.Graph(self)
-        try:
-            all = nx.shortest_simple_paths(self._g, fr, to,
-                                           weight=Fabric.link_weight)
-        except Exception as e:
-            log.error(f'all_shortest_paths: fr={fr}, to={to}: "{e}"')
-            return
+        all = self.hops.paths(fr, to)
         path_cnt = 1
         for path in all:
             if path_cnt == 1:
@@ -557,8 +556,8 @@ class Fabric(nx.MultiGraph):
                 yield rt
 
     def find_routes(self, fr: Component, to: Component,
-                    cutoff_factor: float = 3.0,
-                    min_paths: int = 2, routes: List[Route] = None,
+                    cutoff_factor: float = CUTOFF_FACTOR,
+                    min_paths: int = MIN_PATHS, routes: List[Route] = None,
                     cur_routes: List[Route] = None,
                     max_routes: int = None) -> Iterator[Route]:
         if routes is not None: # explicit routes param ignores max_routes
@@ -660,6 +659,8 @@ class Fabric(nx.MultiGraph):
                            op='add', invertTypes=True)
         return (new_rts, keep_rts)
 
+    @timed(comp=lambda self, fr, to, *args, **kwargs: to,
+           fab=lambda self, *args, **kwargs: self)
     def setup_bidirectional_routing(self, fr: Component, to: Component,
                                     write_to_ssdt=True,
                                     res=False) -> RoutesTuple:
@@ -718,10 +719,28 @@ class Fabric(nx.MultiGraph):
             self.send_mgrs(['sfm', 'llamas'], 'mgr_routes', 'routes', js,
                            op='remove', invertTypes=True)
 
-    def recompute_routes(self, iface1, iface2):
-        # Revisit: this is O(n**2) during crawl-out, worse later
-        # Revisit: can we make use of iface1/2 to do better?
-        for fr, to in self.routes.fr_to.keys():
+    def recompute_routes(self, iface1, iface2,
+                         cutoff_factor: float = CUTOFF_FACTOR,
+                         min_paths: int = MIN_PATHS) -> Tuple[int, int]:
+        '''Recompute routes after adding the link iface1 - iface2.
+        Only pairs that find_routes() could now route across the new
+        link are examined: those with a path via the link within the
+        cutoff, or with fewer than min_paths routes.
+        Returns (examined, skipped) pair counts.
+        '''
+        fr_to = list(self.routes.fr_to.keys())
+        frs = [fr for fr, _ in fr_to]
+        # DR routes are extensions of the routes to the DR comp
+        tos = [to if to.dr is None else to.dr.comp for _, to in fr_to]
+        few = [len(self.get_routes(fr, to)) < min_paths for fr, to in fr_to]
+        in_reach = self.hops.link_in_reach(frs, tos, iface1.comp, iface2.comp,
+                                           cutoff_factor, any_path=few)
+        examined = int(in_reach.sum())
+        skipped = len(fr_to) - examined
+        log.info(f'recompute routes for new link {iface1} - {iface2}: examining {examined}, skipping {skipped} pairs')
+        for (fr, to), hit in zip(fr_to, in_reach):
+            if not hit:
+                continue
             if not fr.usable or not to.usable:
                 log.debug(f'skipping recompute routes for unusable {fr}, {to}')
                 continue
@@ -730,6 +749,7 @@ class Fabric(nx.MultiGraph):
                 self.setup_routing(fr, to) # Revisit: save results
             except nx.exception.NetworkXNoPath:
                 log.debug(f'cannot recompute routes for unreachable {fr}, {to}')
+        return (examined, skipped)
 
     def replace_dr_routes(self, fr: Component, to: Component):
         for dr_rt in filter(lambda x: x.is_dr, self.get_routes(fr, to)):
@@ -766,7 +786,7 @@ class Fabric(nx.MultiGraph):
             fr_iface.edge_key = key
             to_iface.edge_key = key
             log.debug(f'add_link {fr_iface} - {to_iface}, key={key}')
-            self._g = None  # will be recreated in all_shortest_paths()
+            self.hops.add_link(fr_iface, to_iface, key)
             return True
         return False
 
@@ -780,10 +800,14 @@ class Fabric(nx.MultiGraph):
             to_iface.edge_key = None
             self.remove_edge(fr, to, key)
             log.debug(f'remove_link {fr_iface} - {to_iface}, key={key}')
-            self._g = None  # will be recreated in all_shortest_paths()
+            self.hops.remove_link(fr_iface, to_iface, key)
             return True
         return False
 
+    def remove_node(self, comp: Component) -> None:
+        super().remove_node(comp)
+        self.hops.remove_comp(comp)
+
     def make_path(self, gcid):
         return fabs / 'fabric{f}/{f}:{s:04x}/{f}:{s:04x}:{c:03x}'.format(
             f=self.fabnum, s=gcid.sid, c=gcid.cid)
@@ -842,6 +866,7 @@ class Fabric(nx.MultiGraph):
         elif errName == 'SwitchPktRelayFailure':
             # log LPRT for debug
             iface.lprt_read(force=True, verbosity=4)
+            iface.lprt_load()  # read every row while the file is open
             log.debug(iface.lprt)
         try:
             # clear IErrorStatus bitK
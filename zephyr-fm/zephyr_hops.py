@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+
+# Copyright  ©  2026 IntelliProp Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+import networkx as nx
+from collections import deque
+from typing import List, Iterator
+from zephyr_conf import log
+
+INF = 1 << 20  # unreachable; INF + 1 + INF still fits in int32
+
+class RoutingGraph():
+    '''The Fabric links as routing sees them, kept in sync by
+    Fabric.add_link()/remove_link()/remove_node() and by changes to
+    Interface.usable and Component.dr.
+
+    Components are numbered (numbers of removed components are reused)
+    and each MultiGraph edge is a link id: ends[id] holds the numbers of
+    its components and usable[id] its usability bit, as decided by
+    "usable" (i.e., Fabric.link_usable) when the link or the state of
+    one of its interfaces changes. nbrs[u] maps each neighbor of u to
+    its number of usable links with u, so path searches never look at
+    an unusable link.
+
+    Subclasses are told when a pair of components gains its first usable
+    link (_link_added()) or loses its last one (_link_removed()).
+    '''
+    def __init__(self, fab, usable, capacity=64):
+        self.fab = fab
+        self.link_usable = usable
+        self.index = {}     # key: Component, value: number
+        self.comps = []     # key: number, value: Component (or None)
+        self.free = []      # numbers of removed components, for reuse
+        self.nbrs = []      # key: number, value: dict of usable neighbors
+        self.comp_links = []  # key: number, value: set of link ids
+        self.links = {}     # key: (number, number, edge key), value: link id
+        self.iface_links = {}  # key: Interface, value: set of link ids
+        self.link_ifaces = []  # key: link id, value: (Interface, Interface)
+        self.link_keys = []    # key: link id, value: key in links
+        self.free_links = []   # link ids of removed links, for reuse
+        self.ends = np.full((capacity, 2), -1, dtype=np.int32)
+        self.usable = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return len(self.comps)
+
+    def num(self, comp) -> int:
+        '''Return comp's number, adding comp if necessary'''
+        try:
+            return self.index[comp]
+        except KeyError:
+            pass
+        if len(self.free) > 0:
+            i = self.free.pop()
+            self.comps[i] = comp
+        else:
+            i = len(self.comps)
+            self.comps.append(comp)
+            self.nbrs.append({})
+            self.comp_links.append(set())
+            self._num_added(i)
+        self.index[comp] = i
+        self._num_reset(i)
+        return i
+
+    def _num_added(self, i):
+        pass
+
+    def _num_reset(self, i):
+        pass
+
+    def _link_key(self, fr_iface, to_iface, key):
+        u, v = self.num(fr_iface.comp), self.num(to_iface.comp)
+        return (u, v, key) if u <= v else (v, u, key)
+
+    def add_link(self, fr_iface, to_iface, key) -> None:
+        '''Add the link for new edge "key" between fr_iface and to_iface'''
+        with self.fab.lock:
+            link_key = self._link_key(fr_iface, to_iface, key)
+            if link_key in self.links:
+                return
+            if len(self.free_links) > 0:
+                lid = self.free_links.pop()
+                self.link_ifaces[lid] = (fr_iface, to_iface)
+                self.link_keys[lid] = link_key
+            else:
+                lid = len(self.link_ifaces)
+                self.link_ifaces.append((fr_iface, to_iface))
+                self.link_keys.append(link_key)
+                if lid >= len(self.usable):
+                    n = len(self.usable)
+                    self.ends = np.concatenate(
+                        (self.ends, np.full((n, 2), -1, dtype=np.int32)))
+                    self.usable = np.concatenate(
+                        (self.usable, np.zeros(n, dtype=bool)))
+            u, v, _ = link_key
+            self.links[link_key] = lid
+            self.ends[lid] = (u, v)
+            self.comp_links[u].add(lid)
+            self.comp_links[v].add(lid)
+            for iface in (fr_iface, to_iface):
+                self.iface_links.setdefault(iface, set()).add(lid)
+            self._set_usable(lid, bool(self.link_usable(fr_iface, to_iface)))
+
+    def remove_link(self, fr_iface, to_iface, key) -> None:
+        '''Remove the link for edge "key" between fr_iface and to_iface'''
+        with self.fab.lock:
+            lid = self.links.get(self._link_key(fr_iface, to_iface, key))
+            if lid is not None:
+                self._remove_link(lid)
+
+    def _remove_link(self, lid):
+        self._set_usable(lid, False)
+        del self.links[self.link_keys[lid]]
+        u, v = self.ends[lid]
+        self.comp_links[u].discard(lid)
+        self.comp_links[v].discard(lid)
+        for iface in self.link_ifaces[lid]:
+            self.iface_links[iface].discard(lid)
+        self.ends[lid] = -1
+        self.link_ifaces[lid] = None
+        self.link_keys[lid] = None
+        self.free_links.append(lid)
+
+    def remove_comp(self, comp) -> None:
+        '''Forget comp; call after it has been removed from the Fabric'''
+        with self.fab.lock:
+            i = self.index.pop(comp, None)
+            if i is None:
+                return
+            for lid in list(self.comp_links[i]):
+                self._remove_link(lid)
+            self.comps[i] = None
+            self.free.append(i)
+            self._num_reset(i)
+
+    def update_iface(self, iface) -> None:
+        '''Re-check the links of iface (e.g., when iface.usable changes)'''
+        with self.fab.lock:
+            for lid in self.iface_links.get(iface, ()):
+                self._set_usable(lid, bool(
+                    self.link_usable(*self.link_ifaces[lid])))
+
+    def update_comp(self, comp) -> None:
+        '''Re-check all links of comp (e.g., when comp.dr changes)'''
+        with self.fab.lock:
+            for iface in comp.interfaces:
+                self.update_iface(iface)
+
+    def _set_usable(self, lid, usable):
+        if usable == self.usable[lid]:
+            return
+        self.usable[lid] = usable
+        u, v = (int(i) for i in self.ends[lid])
+        cnt = self.nbrs[u].get(v, 0) + (1 if usable else -1)
+        if cnt > 0:
+            self.nbrs[u][v] = self.nbrs[v][u] = cnt
+        else:
+            del self.nbrs[u][v]
+            del self.nbrs[v][u]
+        if usable and cnt == 1:
+            self._link_added(u, v)
+        elif not usable and cnt == 0:
+            self._link_removed(u, v)
+
+    def _link_added(self, u, v):
+        pass
+
+    def _link_removed(self, u, v):
+        pass
+
+class HopMatrix(RoutingGraph):
+    '''All-pairs hop count and next-hop matrices over the usable links
+    of a RoutingGraph.
+
+    dist[a, b] is the number of hops on a shortest path from a to b
+    (INF if unreachable) and next_hop[a, b] is the first hop on one such
+    path (-1 if none). Both are kept current as links are added, removed,
+    or change usability: an added link only ever shortens paths, so it is
+    merged in with a few whole-matrix operations; a removed link only
+    re-runs a BFS from the components that had a shortest path across it.
+    '''
+    def __init__(self, fab, usable, capacity=64):
+        super().__init__(fab, usable, capacity=capacity)
+        self.dist = np.full((capacity, capacity), INF, dtype=np.int32)
+        self.next_hop = np.full((capacity, capacity), -1, dtype=np.int32)
+
+    def _num_added(self, i):
+        if i >= self.dist.shape[0]:
+            self._grow(2 * self.dist.shape[0])
+
+    def _num_reset(self, i):
+        self.dist[i, :] = INF
+        self.dist[:, i] = INF
+        self.next_hop[i, :] = -1
+        self.next_hop[:, i] = -1
+        if self.comps[i] is not None:
+            self.dist[i, i] = 0
+
+    def _grow(self, capacity):
+        n = self.dist.shape[0]
+        dist = np.full((capacity, capacity), INF, dtype=np.int32)
+        next_hop = np.full((capacity, capacity), -1, dtype=np.int32)
+        dist[:n, :n] = self.dist
+        next_hop[:n, :n] = self.next_hop
+        self.dist, self.next_hop = dist, next_hop
+
+    def hops(self, fr, to) -> int:
+        '''Return the hop count of a shortest path from fr to to,
+        or INF if there is none'''
+        if fr is to:
+            return 0
+        try:
+            return int(self.dist[self.index[fr], self.index[to]])
+        except KeyError:
+            return INF
+
+    def _nums(self, comps) -> np.ndarray:
+        return np.fromiter((self.index.get(comp, -1) for comp in comps),
+                           dtype=np.intp, count=len(comps))
+
+    def link_in_reach(self, frs, tos, fr, to, cutoff_factor: float,
+                      any_path=None) -> np.ndarray:
+        '''For each pair (frs[k], tos[k]), return True if a path across
+        the link fr - to is at most cutoff_factor times as long as the
+        pair's shortest path, like the all_shortest_paths() cutoff - or,
+        where any_path[k] is True, if there is any path across the link.
+        '''
+        F, T = self._nums(frs), self._nums(tos)
+        known = (F >= 0) & (T >= 0)
+        u, v = self.index.get(fr), self.index.get(to)
+        if u is None or v is None:
+            return np.zeros(len(F), dtype=bool)
+        dist = self.dist
+        # no path across the link is shorter than this (it may not even
+        # be a simple path), so skipping pairs beyond the cutoff is safe
+        via = np.minimum(dist[F, u] + 1 + dist[v, T],
+                         dist[F, v] + 1 + dist[u, T])
+        cutoff = np.floor(dist[F, T] * cutoff_factor)
+        reach = via <= cutoff
+        if any_path is not None:
+            reach |= np.asarray(any_path, dtype=bool) & (via < INF)
+        return reach & known
+
+    def _link_added(self, u, v):
+        n = len(self.comps)
+        dist = self.dist[:n, :n]
+        next_hop = self.next_hop[:n, :n]
+        du = dist[:, u].copy()  # dist is symmetric, so also dist[u, :]
+        dv = dist[:, v].copy()
+        # first hop from each a towards u (or v), for paths a..u-v..b
+        nh_u = next_hop[:, u].copy()
+        nh_u[u] = v
+        nh_v = next_hop[:, v].copy()
+        nh_v[v] = u
+        cnt = 0
+        for d_fr, d_to, nh in ((du, dv, nh_u), (dv, du, nh_v)):
+            via = d_fr[:, None] + 1 + d_to[None, :]
+            better = via < dist
+            dist[better] = via[better]
+            np.copyto(next_hop, nh[:, None], where=better)
+            cnt += np.count_nonzero(better)
+        log.debug(f'hops: link {self.comps[u]} - {self.comps[v]} added, shortened {cnt} paths')
+
+    def _link_removed(self, u, v):
+        n = len(self.comps)
+        dist = self.dist[:n, :n]
+        du = dist[:, u]
+        dv = dist[:, v]
+        # pairs with a shortest path across u-v (in either direction)
+        across = ((du[:, None] + 1 + dv[None, :] == dist) |
+                  (dv[:, None] + 1 + du[None, :] == dist))
+        srcs = np.flatnonzero(across.any(axis=1))
+        for a in srcs:
+            self._bfs(int(a))
+        log.debug(f'hops: link {self.comps[u]} - {self.comps[v]} removed, recomputed {len(srcs)} sources')
+
+    def _bfs(self, a):
+        n = len(self.comps)
+        dist = np.full(n, INF, dtype=np.int32)
+        next_hop = np.full(n, -1, dtype=np.int32)
+        dist[a] = 0
+        queue = deque()
+        for v in self.nbrs[a]:
+            dist[v] = 1
+            next_hop[v] = v
+            queue.append(v)
+        while queue:
+            x = queue.popleft()
+            for v in self.nbrs[x]:
+                if dist[v] == INF:
+                    dist[v] = dist[x] + 1
+                    next_hop[v] = next_hop[x]
+                    queue.append(v)
+        self.dist[a, :n] = dist
+        self.dist[:n, a] = dist
+        self.next_hop[a, :n] = next_hop
+
+    def _nbrs(self, u, t) -> Iterator[int]:
+        # next hop first, so the first path found is found without search
+        h = int(self.next_hop[u, t])
+        if h >= 0:
+            yield h
+        for v in self.nbrs[u]:
+            if v != h:
+                yield v
+
+    def _paths_len(self, s, t, length) -> Iterator[List[int]]:
+        '''Yield simple paths s..t of exactly "length" hops, using the
+        hop counts to prune every branch that cannot reach t in time'''
+        dist = self.dist
+        path = [s]
+        on_path = {s}
+        stack = [self._nbrs(s, t)]
+        while stack:
+            for v in stack[-1]:
+                if v in on_path or len(path) + dist[v, t] > length:
+                    continue
+                if v == t:
+                    if len(path) == length:
+                        yield path + [t]
+                    continue
+                path.append(v)
+                on_path.add(v)
+                stack.append(self._nbrs(v, t))
+                break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+        # end while
+
+    def paths(self, fr, to) -> Iterator[List['Component']]:
+        '''Yield the simple paths from fr to to, shortest first, like
+        nx.shortest_simple_paths() with unit link weights. Raises
+        nx.NetworkXNoPath if to is unreachable from fr.
+        '''
+        s, t = self.index.get(fr), self.index.get(to)
+        if s is None or t is None or self.dist[s, t] >= INF:
+            raise nx.NetworkXNoPath(f'node {to} not reachable from {fr}')
+        if s == t:
+            yield [fr]
+            return
+        comps = self.comps
+        for length in range(int(self.dist[s, t]), len(self.index)):
+            for path in self._paths_len(s, t, length):
+                yield [comps[i] for i in path]
@@ -28,6 +28,7 @@ from genz.genz_common import GCID, CState, IState, AKey, RKey, PHYOpStatus, ErrS
 from pdb import set_trace
 import zephyr_conf
 from zephyr_conf import log
+from zephyr_metrics import timed
 
 class Interface():
     def __init__(self, component, num, peer_iface=None, usable=False):
@@ -52,6 +53,17 @@ class Interface():
         self.ingress_akey_mask_refcount = RefCount((64, 1))
         self.egress_akey_mask_refcount = RefCount((64, 1))
 
+    @property
+    def usable(self):
+        return self._usable
+
+    @usable.setter
+    def usable(self, usable):
+        changed = usable != getattr(self, '_usable', usable)
+        self._usable = usable
+        if changed:
+            self.comp.fab.hops.update_iface(self)
+
     def setup_paths(self, prefix):
         self._prefix = prefix
         try:
@@ -78,7 +90,7 @@ class Interface():
         self.setup_paths(prefix)
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -100,13 +112,15 @@ class Interface():
         return False
 
     # Returns True if interface is usable - is I-Up, not I-Down/I-CFG/I-LP
+    @timed(comp=lambda self, *args, **kwargs: self.comp,
+           fab=lambda self, *args, **kwargs: self.comp.fab)
     def iface_init(self, prefix='control', no_akeys=False):
         genz = zephyr_conf.genz
         self.setup_paths(prefix)
         iface_file = self.iface_dir / 'interface'
         is_switch = self.comp.has_switch
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -294,7 +308,7 @@ class Interface():
     def clear_ierror_status(self, bitNum: int) -> None:
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -352,7 +366,7 @@ class Interface():
     def do_nonce_init(self, sendNonce=True, noNonce=False) -> bool:
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -393,7 +407,7 @@ class Interface():
     def update_peer_info(self):
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -421,7 +435,7 @@ class Interface():
     def peer_c_reset(self):
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -600,7 +614,7 @@ class Interface():
                 'interface_phy0@*'))[0]
             phy_file = phy_dir / 'interface_phy'
             with phy_file.open(mode='rb+') as f:
-                data = bytearray(f.read())
+                data = self.comp.control_data(f)
                 phy = self.comp.map.fileToStruct('interface_phy', data, fd=f.fileno(),
                                                  verbosity=self.comp.verbosity)
                 if phy.all_ones_type_vers_size():
@@ -633,7 +647,7 @@ class Interface():
     def compute_mhc_hc(self, cid: int, rt: int, hc: int, valid: int):
         if self.lprt is None:
             return (hc, hc, valid, rt != 0, False)
-        row = self.lprt[cid]
+        row = self.lprt_row(cid)
         info = self.route_info[cid][rt]
         return self.comp.compute_mhc_hc_row(row, info, cid, rt, hc, valid)
 
@@ -645,35 +659,48 @@ class Interface():
         if verbosity is None:
             verbosity = self.comp.verbosity
         from zephyr_route import RouteInfo
-        # Revisit: avoid open/close (via "with") on every read?
         lprt_file = self.lprt_dir / 'lprt'
-        with lprt_file.open(mode='rb+', buffering=0) as f:
-            data = bytearray(f.read())
-            self.lprt = self.comp.map.fileToStruct('lprt', data,
+        with zephyr_conf.files.open(lprt_file) as f:
+            # rows are read on demand - see ControlTableArray.load()
+            self.lprt = self.comp.map.fileToStruct('lprt', None,
                                 path=lprt_file, core=self.comp.core,
-                                fd=f.fileno(), verbosity=verbosity)
+                                fd=f.fileno(), verbosity=verbosity, lazy=True)
+            self.lprt.set_fd(f)
             if self.route_info is None:
                 self.route_info = [[RouteInfo() for j in range(self.lprt.cols)]
                                    for i in range(self.lprt.rows)]
         # end with
 
+    def lprt_row(self, cid):
+        '''Return LPRT row "cid", reading it from the current LPRT file
+        if it has not been loaded yet'''
+        with zephyr_conf.files.open(self.lprt_dir / 'lprt') as f:
+            self.lprt.set_fd(f)
+            return self.lprt[cid]
+
+    def lprt_load(self):
+        '''Read the whole LPRT at once, e.g., before dumping it'''
+        if self.lprt_dir is None or self.lprt is None:
+            return
+        with zephyr_conf.files.open(self.lprt_dir / 'lprt') as f:
+            self.lprt.set_fd(f)
+            self.lprt.load()
+
     def lprt_write(self, cid, ei, rt=0, valid=1, mhc=None, hc=None, vca=None,
-                   mhcOnly=False):
+                   mhcOnly=False, flush=True):
         if self.lprt_dir is None:
             return
         from zephyr_route import RouteInfo
-        # Revisit: avoid open/close (via "with") on every write?
         lprt_file = self.lprt_dir / 'lprt'
-        with lprt_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(lprt_file) as f:
             if self.lprt is None:
-                data = bytearray(f.read())
-                self.lprt = self.comp.map.fileToStruct('lprt', data,
+                self.lprt = self.comp.map.fileToStruct('lprt', None,
                                 path=lprt_file, core=self.comp.core,
-                                fd=f.fileno(), verbosity=self.comp.verbosity)
+                                fd=f.fileno(), verbosity=self.comp.verbosity,
+                                lazy=True)
                 self.route_info = [[RouteInfo() for j in range(self.lprt.cols)]
                                    for i in range(self.lprt.rows)]
-            else:
-                self.lprt.set_fd(f)
+            self.lprt.set_fd(f)
             sz = ctypes.sizeof(self.lprt.element)
             self.lprt[cid][rt].MHC = mhc if (mhc is not None and rt == 0) else 0
             if not mhcOnly:
@@ -682,17 +709,19 @@ class Interface():
                 self.lprt[cid][rt].HC = hc if hc is not None else 0
                 self.lprt[cid][rt].VCA = vca if vca is not None else 0
             self.comp.control_write(self.lprt, self.lprt.element.MHC,
-                                    off=self.lprt.cs_offset(cid, rt), sz=sz)
+                                    off=self.lprt.cs_offset(cid, rt), sz=sz,
+                                    defer=True)
+            if flush:
+                self.comp.control_flush(self.lprt)
         # end with
 
     def vcat_write(self, vc, vcm, action=0, th=None):
         if self.vcat_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         vcat_file = self.vcat_dir / 'vcat'
-        with vcat_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(vcat_file) as f:
             if self.vcat is None:
-                data = bytearray(f.read())
+                data = self.comp.control_data(f)
                 self.vcat = self.comp.map.fileToStruct('vcat', data,
                                 path=vcat_file, core=self.comp.core,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
@@ -709,11 +738,10 @@ class Interface():
     def istats_write(self, enb=True, reset=False, snapshot=False):
         if self.istats_dir is None:
             return
-        # Revisit: avoid open/close (via "with") on every write?
         istats_file = self.istats_dir / 'interface_statistics'
-        with istats_file.open(mode='rb+', buffering=0) as f:
+        with zephyr_conf.files.open(istats_file) as f:
             if self.istats is None:
-                data = bytearray(f.read())
+                data = self.comp.control_data(f)
                 self.istats = self.comp.map.fileToStruct('interface_statistics',
                                 data, path=istats_file, core=self.comp.core,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
@@ -750,7 +778,7 @@ class Interface():
             return
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -772,7 +800,7 @@ class Interface():
             return
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -788,7 +816,7 @@ class Interface():
         genz = zephyr_conf.genz
         iface_file = self.iface_dir / 'interface'
         with iface_file.open(mode='rb+') as f:
-            data = bytearray(f.read())
+            data = self.comp.control_data(f)
             iface = self.comp.map.fileToStruct('interface', data,
                                 fd=f.fileno(), verbosity=self.comp.verbosity)
             if iface.all_ones_type_vers_size():
@@ -822,6 +850,7 @@ class Interface():
         if prefix is not None:
             self._prefix = prefix
         log.debug('iface{}: current path: {}'.format(self.num, self.iface_dir))
+        zephyr_conf.files.invalidate(self.iface_dir)
         self.iface_dir = list((self.comp.path / self._prefix / 'interface').glob(
             'interface{}@*'.format(self.num)))[0]
         log.debug('iface{}: new path: {}'.format(self.num, self.iface_dir))
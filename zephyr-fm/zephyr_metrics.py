@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# Copyright  ©  2026 IntelliProp Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock, local
+
+class Span():
+    '''One timed phase. "path" is the '/'-separated names of the span
+    and its enclosing spans, e.g. "fab_init/comp_init/iface_init".
+    '''
+    def __init__(self, name, parent=None, comp=None):
+        self.name = name
+        self.parent = parent
+        self.path = name if parent is None else f'{parent.path}/{name}'
+        self.comp = comp if comp is not None or parent is None else parent.comp
+        self.stats = Counter()
+
+class Metrics():
+    '''Hierarchical wall-time spans with control read/write counters,
+    for one fabric (see Fabric.metrics).
+
+    Each thread has its own stack of open spans. Control I/O is counted
+    in the innermost open span; when a span ends, its I/O counts are
+    added to its parent, and its totals are added to the per-phase and
+    per-component tables, keyed by span path. Components are named by
+    cuuid:serial (or GCID, before that is known), so the calls of a
+    component that is removed and found again add up. Time and I/O are
+    inclusive of nested spans.
+    '''
+    def __init__(self):
+        self._local = local()
+        self._lock = Lock()
+        self.phases = {}  # key: span path
+        self.comps = {}   # key: cuuid_serial (or GCID) str, then span path
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if len(stack) > 0 else None
+
+    @contextmanager
+    def span(self, name, comp=None):
+        stack = self._stack()
+        span = Span(name, parent=self.current(), comp=comp)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            stack.pop()
+            stats = span.stats
+            stats['calls'] = 1
+            stats['time'] = time.perf_counter() - start
+            with self._lock:
+                if span.parent is not None:
+                    for key in ('reads', 'read_bytes', 'writes', 'write_bytes'):
+                        span.parent.stats[key] += stats[key]
+                self.phases.setdefault(span.path, Counter()).update(stats)
+                if span.comp is not None:
+                    # by name, so removed Components are not kept alive
+                    name = str(span.comp.cuuid_serial or span.comp.gcid)
+                    comp_phases = self.comps.setdefault(name, {})
+                    comp_phases.setdefault(span.path, Counter()).update(stats)
+
+    @contextmanager
+    def attach(self, span):
+        '''Make "span" (from another thread) the parent of this thread's
+        spans, e.g., for a worker thread of a Crawl wave
+        '''
+        stack = self._stack()
+        if span is not None:
+            stack.append(span)
+        try:
+            yield span
+        finally:
+            if span is not None:
+                stack.pop()
+
+    def read(self, nbytes):
+        span = self.current()
+        if span is not None:
+            with self._lock:  # span may be shared by attach()
+                span.stats['reads'] += 1
+                span.stats['read_bytes'] += nbytes
+
+    def write(self, nbytes):
+        span = self.current()
+        if span is not None:
+            with self._lock:
+                span.stats['writes'] += 1
+                span.stats['write_bytes'] += nbytes
+
+    def clear(self):
+        with self._lock:
+            self.phases.clear()
+            self.comps.clear()
+
+    def to_json(self):
+        with self._lock:
+            phases = { path: dict(stats) for path, stats in self.phases.items() }
+            comps = { name:
+                      { path: dict(stats) for path, stats in comp_phases.items() }
+                      for name, comp_phases in self.comps.items() }
+        return { 'phases': phases, 'components': comps }
+
+def timed(comp=lambda self, *args, **kwargs: self,
+          fab=lambda self, *args, **kwargs: self.fab):
+    '''Decorator: record each call of a method as a span named after it,
+    in the Metrics of the fabric fab(*args, **kwargs) returns (by default,
+    "self.fab"), for the component comp(*args, **kwargs) returns (by
+    default, the method's "self"); comp=None records no component.
+    '''
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            c = comp(*args, **kwargs) if comp is not None else None
+            with fab(*args, **kwargs).metrics.span(fn.__name__, comp=c):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -104,10 +104,10 @@ class RouteElement():
             return True
         if self.ingress_iface is None: # SSDT
             fr.ssdt_read()
-            row = fr.ssdt[cid]
+            row = fr.ssdt_row(cid)
         else: # LPRT
             self.ingress_iface.lprt_read()
-            row = self.ingress_iface.lprt[cid]
+            row = self.ingress_iface.lprt_row(cid)
         found = None
         free = None
         for i in range(len(row)):
@@ -157,9 +157,10 @@ class RouteElement():
         mhc, hc, v, wr0, wrN = comp.compute_mhc_hc(dcid, self.rt_num,
                                                    self.hc, valid)
         # Revisit: vca
-        if wrN:
+        if wrN: # if wr0, both entries are written by its flush
             comp.ssdt_write(dcid, self.egress_iface.num,
-                            rt=self.rt_num, valid=v, mhc=mhc, hc=hc)
+                            rt=self.rt_num, valid=v, mhc=mhc, hc=hc,
+                            flush=not wr0)
         if wr0:
             comp.ssdt_write(dcid, 0, mhc=mhc, mhcOnly=True)
 
@@ -180,9 +181,10 @@ class RouteElement():
         mhc, hc, v, wr0, wrN = iface.compute_mhc_hc(dcid, self.rt_num,
                                                     self.hc, valid)
         # Revisit: vca
-        if wrN:
+        if wrN: # if wr0, both entries are written by its flush
             iface.lprt_write(dcid, self.egress_iface.num,
-                             rt=self.rt_num, valid=v, mhc=mhc, hc=hc)
+                             rt=self.rt_num, valid=v, mhc=mhc, hc=hc,
+                             flush=not wr0)
         if wr0:
             iface.lprt_write(dcid, 0, mhc=mhc, mhcOnly=True)
 
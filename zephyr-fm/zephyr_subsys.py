@@ -340,6 +340,17 @@ def main():
                         help='Write MGR-UUID workaround for broken capture')
     parser.add_argument('--pause-after', action='store', default=None, type=int,
                         help='pause after initializing this many components')
+    parser.add_argument('--mmap', action='store_true',
+                        help='mmap control space files where possible')
+    parser.add_argument('--max-open-files', action='store', default=128,
+                        type=int, help='max control files kept open (default: %(default)d)')
+    parser.add_argument('--max-xfer', action='store', default=256,
+                        type=int, help='max bytes per batched control write (default: %(default)d)')
+    parser.add_argument('--max-crawl-parallelism', action='store', default=1,
+                        type=int, help='max interfaces explored concurrently during crawl-out (default: %(default)d)')
+    parser.add_argument('--metrics', action='store', default=None,
+                        help='write per-phase exploration metrics (JSON, '
+                        'keyed by fabric number) to this file')
     ip_group = parser.add_mutually_exclusive_group()
     ip_group.add_argument('--ip6', action='store_true',
                           help='listen on IPv4 and IPv6')
@@ -422,6 +433,11 @@ def main():
         log.info('no local Gen-Z bridges found')
         return
 
+    if args.metrics is not None and not args.sfm:
+        with open(args.metrics, 'w') as f:
+            json.dump({ fab.fabnum: fab.metrics.to_json()
+                        for fab in fabrics.values() }, f, indent=2)
+
     if not args.sfm:
         if args.keyboard > 3:
             set_trace()